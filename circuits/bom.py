@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+
+# 基板ごとのルート回路図と部品表ワークブック（circuits/ からの相対パス）
+BOARDS = {
+    'Drive': ('Drive/Drive.kicad_sch', 'Drive/Drive.xlsx'),
+    'RasPi': ('RasPi/RasPi.kicad_sch', 'RasPi/RasPi.xlsx'),
+    'DCDC': ('DCDC/DCDC.kicad_sch', None),
+    'Amp': ('Amp/Amp.kicad_sch', None),
+    '1stLayer_Power': ('Imposition/1stLayer_Power/1stLayer_Power.kicad_sch',
+                       'Imposition/1stLayer_Power/1stLayer_Power.xlsx'),
+    '2ndLayer_3rdLayer': ('Imposition/2ndLayer_3rdLayer/2ndLayer_3rdLayer.kicad_sch',
+                          'Imposition/2ndLayer_3rdLayer/2ndLayer_3rdLayer.xlsx'),
+    'Panel': ('Panel/Panel.kicad_sch', None),
+}
+
+CIRCUITS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(CIRCUITS_DIR)
+CACHE_DIR = os.path.join(CIRCUITS_DIR, '.bom_cache')
+# キャッシュ形式を変えた場合はここを上げて古いキャッシュを無効にする
+CACHE_VERSION = 2
+
+# 数量列として扱うヘッダ名
+QTY_PER_BOARD_HEADERS = ('1枚当たりの個数', '1台当たりの個数')
+PURCHASED_HEADERS = ('購入数',)
+STOCK_HEADERS = ('在庫',)
+
+# 部品表/買い物リストの表記 -> 回路図側のキー（どちらも normalize_value 後）
+#   キーは行全体（'種類/備考1/備考2...'）、または備考・種類の1項目。
+#   値は回路図の Value か lib_id のシンボル名と一致するもの、またはフットプリント名に含まれる文字列
+#   （コネクタやスイッチは Value が汎用名なので、型番の入ったフットプリント名で探す）
+SHEET_ALIASES = {
+    # LED の色
+    '緑': 'green', '青': 'blue', '黄緑': 'lightgreen', '赤': 'red', '黄色': 'yellow',
+    # IC・モジュール
+    'az1117ch': 'az1117ch-3.3',
+    'pim573': 'sensor_opticalflowsensor_pim573',
+    'raspberrypicm4': 'sbc_rpi-cm4',
+    'tangprimer25k': 'fpga_tangprimer25k_core',
+    'twelite': 'twe-l-wx',
+    'oled': 'display_akzk_128x68oled',
+    'pt8211s': 'dac_pt8211s',
+    'lpjk7001agnl': 'rj45_lpjk7001agnl',
+    '積セラ/10uf/50v/2012': '10uf_50v',
+    # コネクタ（Molex の型番はフットプリント名に入っている）
+    'usb-c/poweronly': 'usb_c_receptacle_poweronly_6p',
+    'xt30': 'amass_xt30u-m',
+    'ミゼット': 'fuseholder_blade_mini_keystone_3568',
+    'ボックスヘッダ/ヘッダ/2x7p/h/1.27mm/tht': 'boxheader_2x07_p1.27mm_horizontal',
+    '3220-14-0200-00': 'boxheader_2x07_p1.27mm_horizontal',
+    'xh/ポスト/2p': 'jst_xh_b2b-xh-am_1x02',
+    '22057025': 'molex_spox_5268-02a',
+    '22035025': 'molex_spox_5267-02a',
+    'picoblade/ポスト/2p/h': 'picoblade_53261-0271',
+    'picoblade/ポスト/3p/h': 'picoblade_53261-0371',
+    'picoblade/ポスト/3p/v': 'picoblade_53398-0371',
+    'picoblade/ポスト/4p/h': 'picoblade_53261-0471',
+    'picoblade/ポスト/5p/h': 'picoblade_53261-0571',
+    'picoblade/ポスト/6p/h': 'picoblade_53261-0671',
+    'picoblade/ポスト/6p/v': 'picoblade_53398-0671',
+    'picoblade/ポスト/8p/h': 'picoblade_53261-0871',
+    'picoblade/ポスト/8p/v': 'picoblade_53398-0871',
+    'ピンヘッダ/ヘッダ/1x10p/v/1.27mm/tht': 'pinheader_1x10_p1.27mm_vertical',
+    'ピンヘッダ/ヘッダ/2x10p/v/1.27mm/tht': 'pinheader_2x10_p1.27mm_vertical',
+    'ピンソケット/ソケット/1x10p/v/1.27mm/tht': 'pinsocket_1x10_p1.27mm_vertical',
+    'ピンソケット/ソケット/2x10p/v/1.27mm/tht': 'pinsocket_2x10_p1.27mm_vertical',
+    # 買い物リストは V / THT の位置が違う
+    'ピンヘッダ/ヘッダ/v/tht/1x10p/1.27mm': 'pinheader_1x10_p1.27mm_vertical',
+    'ピンヘッダ/ヘッダ/v/tht/2x10p/1.27mm': 'pinheader_2x10_p1.27mm_vertical',
+    'ピンソケット/ソケット/v/tht/2x10p/1.27mm': 'pinsocket_2x10_p1.27mm_vertical',
+    # スイッチ
+    'skrpabe010': 'sw_push_1p1t_no_vertical_wuerth_434133025816',
+    'スイッチ/タクト/spst/smd/小/縦/白': 'sw_push_1p1t_no_vertical_wuerth_434133025816',
+    'スイッチ/タクト/spst/tht/小/縦/白': 'sw_push_1p1t_6x3.5mm_h4.3_apem_mjtp1243',
+    'スイッチ/タクト/spst/smd/中/縦/黒': 'sw_spst_omron_b3fs-100xp',
+    'is-1235-g': 'sw_slide_spdt_is-1235-g',
+    'ssss213202': 'sw_slide_spdt_ssss213202',
+    'ssss820101': 'sw_slide_dpdt_ssss820101',
+    'ssaj120100': 'sw_slide_spdt_ssaj120100',
+    'スイッチ/4pdip/spstx4/smd': 'sw_dip_x04',
+}
+_ALIAS_TARGETS = frozenset(SHEET_ALIASES.values())
+# 回路図にシンボルが無い付属品（圧着ハウジング・コンタクト）。備考にこの語を含む行は突き合わせない
+ACCESSORY_REMARKS = ('ハウジング', 'コンタクト')
+
+_SYMBOL_START = re.compile(r'^  \(symbol \(lib_id "([^"]*)"\)')
+_SHEET_START = re.compile(r'^  \(sheet ')
+_PROPERTY = re.compile(r'^    \(property "([^"]+)" "((?:[^"\\]|\\.)*)"')
+_IN_BOM = re.compile(r'\(in_bom (yes|no)\)')
+_DNP = re.compile(r'\(dnp (yes|no)\)')
+
+
+def file_hash(path):
+    # ファイル内容のSHA-256（キャッシュキー）
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cached(kind, path, parser):
+    """
+    parser(path) の結果をファイルハッシュをキーにJSONでキャッシュする。
+    内容が変わっていなければ再パースせずにキャッシュを返す。
+    """
+    key = f"{kind}-{CACHE_VERSION}-{file_hash(path)}"
+    cache_file = os.path.join(CACHE_DIR, key + '.json')
+    if os.path.exists(cache_file):
+        with open(cache_file, encoding='utf-8') as f:
+            return json.load(f)
+    result = parser(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False)
+    os.replace(tmp_file, cache_file)
+    return result
+
+
+def parse_schematic(path):
+    """
+    1枚の .kicad_sch を行単位で走査し、配置シンボルと子シートを返す。
+    S式を完全にパースせず、eeschemaが出力する固定インデントを利用する。
+    返り値: {'symbols': [{'lib_id', 'reference', 'value', 'footprint'}, ...],
+             'sheets': [子シートのファイル名, ...]}
+    """
+    symbols = []
+    sheets = []
+    current = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if current is None:
+                m = _SYMBOL_START.match(line)
+                if m:
+                    current = {'kind': 'symbol', 'lib_id': m.group(1), 'props': {}, 'in_bom': True, 'dnp': False}
+                elif _SHEET_START.match(line):
+                    current = {'kind': 'sheet', 'props': {}}
+                continue
+            if line.rstrip() == '  )':
+                # ブロック終端
+                props = current['props']
+                if current['kind'] == 'sheet':
+                    if 'Sheetfile' in props:
+                        sheets.append(props['Sheetfile'])
+                elif current['in_bom'] and not current['dnp'] and not props.get('Reference', '#').startswith('#'):
+                    symbols.append({
+                        'lib_id': current['lib_id'],
+                        'reference': props.get('Reference', ''),
+                        'value': props.get('Value', ''),
+                        'footprint': props.get('Footprint', ''),
+                    })
+                current = None
+                continue
+            m = _PROPERTY.match(line)
+            if m:
+                current['props'][m.group(1)] = m.group(2)
+                continue
+            m = _IN_BOM.search(line)
+            if m:
+                current['in_bom'] = m.group(1) == 'yes'
+            m = _DNP.search(line)
+            if m:
+                current['dnp'] = m.group(1) == 'yes'
+    return {'symbols': symbols, 'sheets': sheets}
+
+
+def collect_board_symbols(root_sch):
+    # ルートシートから階層を辿り、基板上の全シンボルを返す（シートの多重配置も展開）
+    symbols = []
+    stack = [os.path.abspath(root_sch)]
+    while stack:
+        path = stack.pop()
+        sch = cached('sch', path, parse_schematic)
+        symbols.extend(sch['symbols'])
+        base = os.path.dirname(path)
+        stack.extend(os.path.join(base, sheet) for sheet in sch['sheets'])
+    return symbols
+
+
+def _header_index(header, candidates):
+    for i, name in enumerate(header):
+        if name in candidates:
+            return i
+    return None
+
+
+def parse_workbook(path):
+    """
+    部品表/買い物リストのxlsxを読み、先頭シートの行を返す。
+    1行目をヘッダとし、'種類' と '備考' 3列をキー、数量列を値とする。
+    返り値: [{'kind', 'remarks': [..], 'per_board', 'purchased', 'stock'}, ...]
+    """
+    import openpyxl  # xlsxを読む時だけ必要
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    ws = wb.worksheets[0]
+    rows = ws.iter_rows(values_only=True)
+    header = [str(c).strip() if c is not None else '' for c in next(rows, ())]
+    per_board_col = _header_index(header, QTY_PER_BOARD_HEADERS)
+    purchased_col = _header_index(header, PURCHASED_HEADERS)
+    stock_col = _header_index(header, STOCK_HEADERS)
+    items = []
+    for row in rows:
+        if not row or row[0] is None:
+            continue
+
+        def number(col):
+            if col is None or col >= len(row) or not isinstance(row[col], (int, float)):
+                return 0
+            return row[col]
+
+        items.append({
+            'kind': str(row[0]).strip(),
+            'remarks': [str(c).strip() for c in row[1:4] if c is not None],
+            'per_board': number(per_board_col),
+            'purchased': number(purchased_col),
+            'stock': number(stock_col),
+        })
+    wb.close()
+    return items
+
+
+def normalize_value(value):
+    # '0.1uF' / '0.1 µF' / '100nF' / '510Ω' などの表記ゆれを吸収する
+    v = str(value).strip().lower().replace(' ', '').replace('µ', 'u').replace('μ', 'u').replace('ω', '')
+    m = re.fullmatch(r'([0-9.]+)([pnum]?)f', v)
+    if m:
+        scale = {'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'm': 1e-3, '': 1.0}[m.group(2)]
+        return f"{float(m.group(1)) * scale:.3e}F"
+    return v
+
+
+def group_symbols(symbols):
+    # (lib_id, value, footprint) ごとに数を数える
+    counts = defaultdict(int)
+    for s in symbols:
+        counts[(s['lib_id'], s['value'], s['footprint'])] += 1
+    return counts
+
+
+def aggregate(quantities, boards=BOARDS):
+    """
+    全基板のBOMを集計する。
+    quantities: {基板名: 製作枚数}（Panelはパネル枚数）
+    返り値: {基板名: {(lib_id, value, footprint): 1枚当たりの個数}},
+            {(lib_id, value, footprint): 全体の必要数}
+    """
+    per_board = {}
+    total = defaultdict(int)
+    for name, (sch, _) in boards.items():
+        count = quantities.get(name, 1)
+        groups = group_symbols(collect_board_symbols(os.path.join(CIRCUITS_DIR, sch)))
+        per_board[name] = groups
+        for key, n in groups.items():
+            total[key] += n * count
+    return per_board, total
+
+
+def group_matches(key, group):
+    # 突き合わせのキーが回路図のグループ (lib_id, value, footprint) を指しているか
+    # フットプリント名の部分一致は SHEET_ALIASES の別名だけ（'1608' などの備考が誤って当たらないように）
+    lib_id, value, footprint = group
+    if key == normalize_value(value) or key == normalize_value(lib_id.split(':')[-1]):
+        return True
+    return key in _ALIAS_TARGETS and key in normalize_value(footprint.split(':')[-1])
+
+
+def sheet_keys(item):
+    """
+    表の1行から突き合わせのキー候補を具体的なものから順に返す。
+    行全体、各備考、種類の順で、それぞれ SHEET_ALIASES があれば別名を先に試す。
+    """
+    label = normalize_value("/".join([item['kind']] + item['remarks']))
+    keys = []
+    for token in [label] + [normalize_value(r) for r in item['remarks']] + [normalize_value(item['kind'])]:
+        if token in SHEET_ALIASES:
+            keys.append(SHEET_ALIASES[token])
+        keys.append(token)
+    return keys
+
+
+def reconcile(required, sheet_items, qty_fields):
+    """
+    回路図側の数量と表側の数量を突き合わせる。
+    表の行は sheet_keys の候補を順に試し、回路図のグループに最初に当たったキーで集計する
+    （値 '47uF'、種類 'BNO055'、SHEET_ALIASES の別名やフットプリント名の型番など）。
+    required: {(lib_id, value, footprint): 数量}
+    qty_fields: 表側の数量として合計する列（'per_board' / ('purchased', 'stock') など）
+    返り値: {'mismatches': [(キー, 回路図の数, 表の数), ...],
+             'matched': 数量まで一致したキーの数,
+             'schematic_only': [(値, 回路図の数), ...]   表に見つからない値,
+             'sheet_only': [(種類/備考, 表の数), ...]    回路図に見つからない行,
+             'accessories': [(種類/備考, 表の数), ...]   回路図に載らない付属品の行}
+    """
+    if isinstance(qty_fields, str):
+        qty_fields = (qty_fields,)
+    sheet = defaultdict(int)
+    sheet_only = []
+    accessories = []
+    for item in sheet_items:
+        qty = sum(item.get(field, 0) for field in qty_fields)
+        name = "/".join([item['kind']] + item['remarks'])
+        if any(word in remark for remark in item['remarks'] for word in ACCESSORY_REMARKS):
+            accessories.append((name, qty))
+            continue
+        for key in sheet_keys(item):
+            if any(group_matches(key, group) for group in required):
+                sheet[key] += qty
+                break
+        else:
+            sheet_only.append((name, qty))
+    mismatches = []
+    matched = 0
+    for key, n_sheet in sorted(sheet.items()):
+        n = sum(count for group, count in required.items() if group_matches(key, group))
+        if n != n_sheet:
+            mismatches.append((key, n, n_sheet))
+        else:
+            matched += 1
+    # どのキーにも当たらなかった回路図のグループは値ごとにまとめる
+    schematic = defaultdict(int)
+    for group, n in required.items():
+        if not any(group_matches(key, group) for key in sheet):
+            schematic[normalize_value(group[1])] += n
+    return {'mismatches': mismatches, 'matched': matched, 'schematic_only': sorted(schematic.items()),
+            'sheet_only': sheet_only, 'accessories': accessories}
+
+
+def print_unmatched(label, result, sheet_name):
+    # 片側にしかない値は突き合わせできていないので、不一致とは別の区分で表示する
+    matched = result['matched'] + len(result['mismatches'])
+    print(f"  [{label}] 突き合わせ {matched} 件（数量一致 {result['matched']}）、"
+          f"付属品 {len(result['accessories'])} 行")
+    if result['schematic_only']:
+        print(f"  [{label}] {sheet_name}に無い値 ({len(result['schematic_only'])}):")
+        for value, n in result['schematic_only']:
+            print(f"    {value}: 必要数 {n}")
+    if result['sheet_only']:
+        print(f"  [{label}] 回路図に無い行 ({len(result['sheet_only'])}):")
+        for name, n in result['sheet_only']:
+            print(f"    {name}: {n}")
+
+
+def write_bom_csv(path, total):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['lib_id', 'Value', 'Footprint', 'Quantity'])
+        for (lib_id, value, footprint), n in sorted(total.items()):
+            writer.writerow([lib_id, value, footprint, n])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全基板のBOMを集計し、部品表/買い物リストと突き合わせる')
+    parser.add_argument('--panels', type=int, default=1, help='Panel基板の枚数')
+    parser.add_argument('--units', type=int, default=1, help='Panel以外の基板の製作台数')
+    parser.add_argument('--csv', help='集計結果を書き出すCSVのパス')
+    parser.add_argument('--no-cache', action='store_true', help='キャッシュを使わずに再パースする')
+    args = parser.parse_args()
+
+    if args.no_cache:
+        global CACHE_DIR
+        import tempfile
+        CACHE_DIR = tempfile.mkdtemp(prefix='bom_cache_')
+
+    quantities = {name: args.units for name in BOARDS}
+    quantities['Panel'] = args.panels
+    per_board, total = aggregate(quantities)
+
+    for name, groups in per_board.items():
+        print(f"{name}: {sum(groups.values())} parts, {len(groups)} kinds (x{quantities[name]})")
+
+    # 基板ごとの部品表（1枚当たりの個数）との突き合わせ
+    for name, (_, workbook) in BOARDS.items():
+        if workbook is None:
+            continue
+        items = cached('xlsx', os.path.join(CIRCUITS_DIR, workbook), parse_workbook)
+        result = reconcile(per_board[name], items, 'per_board')
+        for value, n_sch, n_sheet in result['mismatches']:
+            print(f"  [{name}] {value}: 回路図 {n_sch} / 部品表 {n_sheet}")
+        print_unmatched(name, result, '部品表')
+
+    # 買い物リストの購入数と全体の必要数の突き合わせ
+    purchased = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, '買い物リスト*.xlsx'))):
+        purchased.extend(cached('xlsx', path, parse_workbook))
+    result = reconcile(total, purchased, ('purchased', 'stock'))
+    for value, n_sch, n_sheet in result['mismatches']:
+        status = '不足' if n_sheet < n_sch else '余剰'
+        print(f"  [買い物リスト] {value}: 必要数 {n_sch} / 購入数+在庫 {n_sheet} ({status})")
+    print_unmatched('買い物リスト', result, '買い物リスト')
+
+    if args.csv:
+        write_bom_csv(args.csv, total)
+        print(f"BOMを出力しました: {args.csv}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import numpy as np
+
+GAIN_SCALE = 255  # ゲインの固定小数点スケール（255 = 1.0）
+
+
+def radial_density(radii, neighbors=50):
+    """
+    各LEDの半径位置での相対的な点密度（1.0 = パネル全体の平均）を返す。
+    回転表示では角度方向は平均化されるため、半径の近いLED neighbors 個を含む円環の
+    面積あたりの個数を密度とする。円環の幅をLEDの個数で決めるので、
+    内周（円環の面積が小さくLEDが少ない）でも推定の粗さが半径によらずほぼ一定になる。
+    """
+    r = np.asarray(radii, dtype=np.float64)
+    n = len(r)
+    k = min(max(int(neighbors), 2), n)
+    sorted_r = np.sort(r)
+    # 各LEDを中心に k 個の窓（端では内側/外側へずらす）
+    center = np.searchsorted(sorted_r, r)
+    start = np.clip(center - k // 2, 0, n - k)
+    lo = sorted_r[start]
+    hi = sorted_r[start + k - 1]
+    # 窓の両端のLEDの間に k - 1 個分の間隔がある
+    density = (k - 1) / (np.pi * np.maximum(hi ** 2 - lo ** 2, 1e-12))
+    mean_density = n / (np.pi * sorted_r[-1] ** 2)
+    return density / mean_density
+
+
+def brightness_gains(radii, neighbors=50, min_gain=0.25, percentile=95):
+    """
+    半径方向の密度むらを打ち消すLEDごとのゲイン（0～1）を返す。
+    外周のLEDは1スロットでより長い円弧を掃くため、同じ円環に入るLEDの数が
+    同じでも面積あたりの光量は下がる。円環の面積/LED数に比例したゲインを掛ける。
+    PWMの上限を超えられないので暗い側に合わせるが、1個の推定値に引きずられないよう
+    ゲインの percentile パーセンタイルを1.0として正規化し、それを超える分は1.0に切り詰める。
+    min_gain: 密度が極端に高い箇所でLEDを消してしまわないための下限
+    """
+    gain = 1.0 / radial_density(radii, neighbors)
+    gain /= np.percentile(gain, percentile)
+    return np.clip(gain, min_gain, 1.0)
+
+
+def quantize_gains(gains):
+    # ファームウェア用の uint8 ゲイン（value * gain >> 8 で適用）
+    return np.round(np.asarray(gains) * GAIN_SCALE).astype(np.uint8)
+
+
+def gamma_table(gamma=2.2, pwm_bits=8):
+    """
+    8bit入力からPWM値へのガンマ補正テーブル（256要素）を返す。
+    pwm_bits が8を超える場合は uint16 のテーブルになる。
+    """
+    pwm_max = (1 << pwm_bits) - 1
+    x = np.arange(256) / 255.0
+    table = np.round(np.power(x, gamma) * pwm_max)
+    return table.astype(np.uint8 if pwm_bits <= 8 else np.uint16)
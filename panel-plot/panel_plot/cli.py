@@ -0,0 +1,136 @@
+import argparse
+import sys
+
+# matplotlib / numpy などの重い依存はサブコマンドの中で必要になった時点で import する
+# （export だけを繰り返し呼ぶスイープやビルドスクリプトで起動を軽くするため）
+
+def add_layout_arguments(parser):
+    parser.add_argument('--adaptive-bands', action='store_true',
+                        help='ユニット境界を動的計画法で最適化してチェーンを短くする')
+    parser.add_argument('--max-hop', type=float, default=None, metavar='MM',
+                        help='--adaptive-bands で点間距離の上限[mm]を課す（指定すると --adaptive-bands も有効）')
+    parser.add_argument('--symmetric', action='store_true',
+                        help='セクター0のチェーンを回転複製した回転対称なレイアウトにする（圧縮LUT用）。'
+                             'export では継ぎ目で部品が重なると units CSV / CPL / BOM を出力しない')
+    parser.add_argument('--verbose', action='store_true', help='theta_offset の探索経過を表示する')
+
+def load_layout(args):
+    from .layout import build_layout
+    return build_layout(adaptive_bands=args.adaptive_bands or args.max_hop is not None, max_hop=args.max_hop,
+                        symmetric=args.symmetric, verbose=args.verbose)
+
+def cmd_layout(args):
+    layout = load_layout(args)
+    print("Final theta_offset:", layout['theta_offset'])
+    print("Sector counts:", layout['sector_counts'])
+    if args.plot:
+        from .plot import plot_layout
+        plot_layout(layout)
+
+def cmd_export(args):
+    from .layout import NEO_PIXEL, MLCC
+    from .output import export_units, export_neopixel_c_header, export_neopixel_brightness_header
+
+    layout = load_layout(args)
+    sector_paths, order_map = layout['sector_paths'], layout['order_map']
+
+    # 対称レイアウトはセクター0を回転複製するので、セクターの継ぎ目で部品が重なることがある
+    # （セクター0の中は元のレイアウトと同じ）。重なる場合は実装用の出力をしない
+    fab_ok = True
+    if args.symmetric:
+        from .tolerance import placement_arrays, candidate_pairs
+        parts = placement_arrays(sector_paths, order_map, NEO_PIXEL, MLCC)
+        overlaps, depth = candidate_pairs(parts, 0.0)
+        if len(overlaps):
+            fab_ok = False
+            units = sorted({(int(parts['unit'][a]), int(parts['unit'][b])) for a, b in overlaps})
+            print(f"Warning: symmetric layout has {len(overlaps)} overlapping part pairs "
+                  f"(up to {-depth.min():.2f} mm deep) at the sector seams, units {units[:8]}"
+                  f"{' ...' if len(units) > 8 else ''}; skipping units CSV and JLCPCB CPL/BOM")
+
+    # CSV出力（JLCPCB用のCPL/BOMも同じ走査で出力）
+    if not args.no_csv and fab_ok:
+        export_units(sector_paths, order_map, NEO_PIXEL, MLCC, jlcpcb={"origin": (0.0, 0.0)}, out_dir=args.out_dir)
+
+    # C言語用のNeoPixel座標データを統合ヘッダファイルとして出力
+    neo_data = export_neopixel_c_header(sector_paths, order_map, NEO_PIXEL, out_dir=args.out_dir)
+
+    # 半径方向の輝度補正ゲインとガンマ補正テーブルを出力（IDは neo_data と同じ並び）
+    if not args.no_brightness:
+        from .brightness import brightness_gains, quantize_gains, gamma_table
+        led_radii = [r for _, path in sorted(sector_paths.items()) for r, _ in path]
+        gains = quantize_gains(brightness_gains(led_radii))
+        export_neopixel_brightness_header(neo_data, gains.tolist(), gamma_table(2.2, 8).tolist(), 2.2, 8,
+                                          out_dir=args.out_dir)
+
+    # LUT も同じレイアウト（--adaptive-bands を含む）から作る
+    if args.lut:
+        from .lut import export_lut
+        export_lut(layout, out_dir=args.out_dir)
+
+def cmd_render(args):
+    from .pov_sim import main as pov_main
+    pov_main(show=not args.no_show)
+
+def cmd_traces(args):
+    from .traces import main as traces_main
+    traces_main(pcb_path=args.pcb, origin=tuple(args.origin), include_violations=args.include_violations)
+
+# bench の対象 -> 実装モジュール（各モジュールの main を呼ぶ）
+BENCH_MODULES = {'pov': 'pov_sim', 'stream': 'stream', 'ring': 'ring',
+                 'power': 'power', 'store': 'frame_store', 'lut': 'lut', 'glyph': 'glyph',
+                 'tolerance': 'tolerance', 'sectors': 'polar_utils'}
+
+def cmd_bench(args):
+    import importlib
+    module = importlib.import_module(f'.{BENCH_MODULES[args.target]}', __package__)
+    if args.target == 'pov':
+        module.main(show=False)
+    elif args.target == 'store':
+        module.main(root=args.store_dir)
+    else:
+        module.main()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='panel-plot', description='Panel基板のNeoPixel配置の生成と出力')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('layout', help='配置とチェーンを計算して表示する')
+    add_layout_arguments(p)
+    p.add_argument('--plot', action='store_true', help='matplotlib で配置を描画する')
+    p.set_defaults(func=cmd_layout)
+
+    p = sub.add_parser('export', help='CSV / Cヘッダ / LUT を出力する（matplotlib は読み込まない）')
+    add_layout_arguments(p)
+    p.add_argument('--out-dir', default=None, help='出力先ディレクトリ（省略時はカレントディレクトリ）')
+    p.add_argument('--no-csv', action='store_true', help='units CSV と JLCPCB CPL/BOM を出力しない')
+    p.add_argument('--no-brightness', action='store_true',
+                   help='neopixel_brightness.h を出力しない（numpy を読み込まない）')
+    p.add_argument('--lut', action='store_true', help='FPGA用のスロットLUT (.mem) も出力する')
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('render', help='POV表示のシミュレーション結果を描画する')
+    p.add_argument('--no-show', action='store_true', help='計算だけ行い描画しない')
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser('traces', help='チェーンの DOUT -> DIN 配線を生成する')
+    p.add_argument('--pcb', default=None, help='配線を書き込む .kicad_pcb（省略時は統計の表示のみ）')
+    p.add_argument('--origin', type=float, nargs=2, default=(0.0, 0.0), metavar=('X', 'Y'),
+                   help='パネル中心の KiCad 座標[mm]')
+    p.add_argument('--include-violations', action='store_true',
+                   help='クリアランス違反の区間も基板に書き込む（既定では書かずに一覧を表示する）')
+    p.set_defaults(func=cmd_traces)
+
+    p = sub.add_parser('bench', help='各モジュールのベンチマークを実行する')
+    p.add_argument('target', choices=sorted(BENCH_MODULES))
+    p.add_argument('--store-dir', default=None, help='bench store のフレームストア保存先（省略時は ./frame_store）')
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+def layout_hash(r, theta):
+    """
+    LED配置（ID順の r, theta）のハッシュ。配置が変わるとリサンプル結果も変わるので、
+    フレームストアはこのハッシュごとにファイルを分ける。
+    """
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(r, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(theta, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def clip_key(*parts):
+    # クリップの識別子（元ファイル名、更新時刻、リサンプル条件などを連結してハッシュ）
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def resample_clip(images, r, theta, extent):
+    """
+    画像列 (F, H, W, C) を各LEDの位置の画素（最近傍）を取った (F, N, C) の uint8 フレームに変換する。
+    画像は [-extent, extent] の正方形領域を表すものとする。
+    """
+    images = np.asarray(images)
+    h, w = images.shape[1:3]
+    x = np.asarray(r) * np.cos(theta)
+    y = np.asarray(r) * np.sin(theta)
+    col = np.clip(((x + extent) / (2 * extent) * w).astype(np.int64), 0, w - 1)
+    # 画像の行は上から下なのでYを反転
+    row = np.clip(((extent - y) / (2 * extent) * h).astype(np.int64), 0, h - 1)
+    return images[:, row, col].astype(np.uint8)
+
+
+class FrameStore:
+    """
+    リサンプル済みのLEDフレームをレイアウトごとに1つのファイルへ詰めて保存し、
+    メモリマップで読み出すフレームストア。
+      <root>/<layout>.frames      : uint8 の (フレーム数, n_leds, channels) を連結したデータ
+      <root>/<layout>.index.json  : {クリップ名: [先頭フレーム, フレーム数]}
+    よく使うクリップはプロセス内のLRUキャッシュ（cache_bytes まで）にメモリ上の配列として保持する。
+    get() はどちらの場合もコピーなしのスライスを返す。
+    """
+
+    def __init__(self, root, layout, n_leds, channels=3, cache_bytes=64 << 20):
+        self.root = root
+        self.n_leds = n_leds
+        self.channels = channels
+        self.frame_bytes = n_leds * channels
+        self.cache_bytes = cache_bytes
+        self.data_path = os.path.join(root, f"{layout}.frames")
+        self.index_path = os.path.join(root, f"{layout}.index.json")
+        os.makedirs(root, exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                self.index = {k: tuple(v) for k, v in json.load(f).items()}
+        self._mmap = None
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def _frames(self, end):
+        # データファイル全体のメモリマップ。フレーム end まで届いていなければ（追記後）開き直す
+        # （同じキーを上書きすると古いフレームがファイルに残るので、索引の合計数では判定できない）
+        if self._mmap is None or self._mmap.shape[0] < end:
+            self._mmap = np.memmap(self.data_path, dtype=np.uint8, mode='r').reshape(
+                -1, self.n_leds, self.channels)
+        return self._mmap
+
+    def _cache_put(self, key, frames):
+        # 同じキーを載せ直すときは古いフレームの分を先に差し引く
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cached_bytes -= old.nbytes
+        if frames.nbytes > self.cache_bytes:
+            return
+        self._cache[key] = frames
+        self._cached_bytes += frames.nbytes
+        # 予算を超えた分を古いものから捨てる
+        while self._cached_bytes > self.cache_bytes:
+            _, old = self._cache.popitem(last=False)
+            self._cached_bytes -= old.nbytes
+
+    def get(self, key):
+        """クリップのフレーム (F, n_leds, channels) を返す。無ければ None"""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if key not in self.index:
+            return None
+        start, count = self.index[key]
+        frames = self._frames(start + count)[start:start + count]
+        # 2回目以降はメモリ上から返せるようにキャッシュへ載せる
+        self._cache_put(key, np.array(frames))
+        return frames
+
+    def put(self, key, frames):
+        """フレームをデータファイルに追記し、索引を更新する"""
+        frames = np.ascontiguousarray(frames, dtype=np.uint8).reshape(-1, self.n_leds, self.channels)
+        start = os.path.getsize(self.data_path) // self.frame_bytes if os.path.exists(self.data_path) else 0
+        with open(self.data_path, 'ab') as f:
+            f.write(frames.tobytes())
+        self.index[key] = (start, len(frames))
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        self._cache_put(key, frames)
+        return frames
+
+    def get_or_render(self, key, render):
+        """保存済みならそれを返し、無ければ render() でリサンプルして保存する"""
+        frames = self.get(key)
+        if frames is None:
+            frames = self.put(key, render())
+        return frames
+
+
+def main(root=None):
+    from .layout import build_layout
+    from .lut import chain_layout
+
+    # フレームはLED ID順（neopixel_coordinates.h と同じ並び）に詰める
+    layout = build_layout()
+    N, comp_phy = layout['n'], layout['comp_phy']
+    r, theta, _, _ = chain_layout(layout['sector_paths'])
+
+    # テスト用アニメーション（回転するグラデーション、120フレーム）
+    size = 256
+    centers = (np.arange(size) + 0.5) / size * comp_phy - comp_phy / 2
+    xx, yy = np.meshgrid(centers, -centers)
+    angle = np.arctan2(yy, xx)
+
+    def render():
+        images = np.empty((120, size, size, 3), dtype=np.uint8)
+        for i in range(120):
+            images[i] = (127.5 * (1 + np.cos(angle[..., None] + i * 2 * np.pi / 120
+                                             + np.array([0, 2, 4]) * np.pi / 3))).astype(np.uint8)
+        return resample_clip(images, r, theta, comp_phy / 2)
+
+    if root is None:
+        root = os.path.join(os.getcwd(), 'frame_store')
+    store = FrameStore(root, layout_hash(r, theta), N)
+    key = clip_key('rotating-gradient', size, 120)
+    for label in ('first', 'second'):
+        start = time.perf_counter()
+        frames = store.get_or_render(key, render)
+        print(f"{label}: {frames.shape} in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
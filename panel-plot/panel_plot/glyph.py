@@ -0,0 +1,211 @@
+import math
+import time
+import numpy as np
+
+# 5x7 ビットマップフォント（1文字5列、各列の bit0 が一番上の行）
+FONT_ROWS = 7
+FONT_COLS = 5
+FONT_5X7 = {
+    ' ': (0x00, 0x00, 0x00, 0x00, 0x00), '!': (0x00, 0x00, 0x5F, 0x00, 0x00),
+    '+': (0x08, 0x08, 0x3E, 0x08, 0x08), '-': (0x08, 0x08, 0x08, 0x08, 0x08),
+    '.': (0x00, 0x60, 0x60, 0x00, 0x00), '/': (0x20, 0x10, 0x08, 0x04, 0x02),
+    ':': (0x00, 0x36, 0x36, 0x00, 0x00), '?': (0x02, 0x01, 0x51, 0x09, 0x06),
+    '0': (0x3E, 0x51, 0x49, 0x45, 0x3E), '1': (0x00, 0x42, 0x7F, 0x40, 0x00),
+    '2': (0x42, 0x61, 0x51, 0x49, 0x46), '3': (0x21, 0x41, 0x45, 0x4B, 0x31),
+    '4': (0x18, 0x14, 0x12, 0x7F, 0x10), '5': (0x27, 0x45, 0x45, 0x45, 0x39),
+    '6': (0x3C, 0x4A, 0x49, 0x49, 0x30), '7': (0x01, 0x71, 0x09, 0x05, 0x03),
+    '8': (0x36, 0x49, 0x49, 0x49, 0x36), '9': (0x06, 0x49, 0x49, 0x29, 0x1E),
+    'A': (0x7E, 0x11, 0x11, 0x11, 0x7E), 'B': (0x7F, 0x49, 0x49, 0x49, 0x36),
+    'C': (0x3E, 0x41, 0x41, 0x41, 0x22), 'D': (0x7F, 0x41, 0x41, 0x22, 0x1C),
+    'E': (0x7F, 0x49, 0x49, 0x49, 0x41), 'F': (0x7F, 0x09, 0x09, 0x09, 0x01),
+    'G': (0x3E, 0x41, 0x49, 0x49, 0x7A), 'H': (0x7F, 0x08, 0x08, 0x08, 0x7F),
+    'I': (0x00, 0x41, 0x7F, 0x41, 0x00), 'J': (0x20, 0x40, 0x41, 0x3F, 0x01),
+    'K': (0x7F, 0x08, 0x14, 0x22, 0x41), 'L': (0x7F, 0x40, 0x40, 0x40, 0x40),
+    'M': (0x7F, 0x02, 0x0C, 0x02, 0x7F), 'N': (0x7F, 0x04, 0x08, 0x10, 0x7F),
+    'O': (0x3E, 0x41, 0x41, 0x41, 0x3E), 'P': (0x7F, 0x09, 0x09, 0x09, 0x06),
+    'Q': (0x3E, 0x41, 0x51, 0x21, 0x5E), 'R': (0x7F, 0x09, 0x19, 0x29, 0x46),
+    'S': (0x46, 0x49, 0x49, 0x49, 0x31), 'T': (0x01, 0x01, 0x7F, 0x01, 0x01),
+    'U': (0x3F, 0x40, 0x40, 0x40, 0x3F), 'V': (0x1F, 0x20, 0x40, 0x20, 0x1F),
+    'W': (0x3F, 0x40, 0x38, 0x40, 0x3F), 'X': (0x63, 0x14, 0x08, 0x14, 0x63),
+    'Y': (0x07, 0x08, 0x70, 0x08, 0x07), 'Z': (0x61, 0x51, 0x49, 0x45, 0x43),
+}
+
+
+def font_bitmap(columns):
+    # 列ごとのビット列を (FONT_ROWS, FONT_COLS) の bool 配列に変換
+    columns = np.asarray(columns, dtype=np.uint8)
+    return ((columns[None, :] >> np.arange(FONT_ROWS)[:, None]) & 1).astype(bool)
+
+
+def pack_bits(mask):
+    """
+    (..., N) の bool 配列をLEDインデックスのビットセット (..., ceil(N/64)) の uint64 に詰める。
+    ビット i（ワード i // 64 の bit i % 64）が ID i のLEDに対応する。
+    """
+    mask = np.asarray(mask, dtype=bool)
+    words = (mask.shape[-1] + 63) // 64
+    packed = np.packbits(mask, axis=-1, bitorder='little')
+    pad = words * 8 - packed.shape[-1]
+    if pad:
+        packed = np.concatenate([packed, np.zeros(packed.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+    return np.ascontiguousarray(packed).view('<u8')
+
+
+def unpack_bits(bits, n):
+    # pack_bits の逆変換: (..., words) -> (..., n) の bool
+    packed = np.ascontiguousarray(bits, dtype='<u8').view(np.uint8)
+    return np.unpackbits(packed, axis=-1, count=n, bitorder='little').astype(bool)
+
+
+def compose(*layers):
+    # ビットセットの重ね合わせ（OR）
+    return np.bitwise_or.reduce(np.stack(layers), axis=0)
+
+
+class GlyphAtlas:
+    """
+    LED配置に対して、文字と図形を「スロットごとに点灯するLEDのビットセット」(slots, words) として
+    前計算しておくアトラス。
+    r, theta: LED ID順の極座標（lut.chain_layout の結果）
+    slots: 1回転あたりの角度スロット数、direction: 回転方向（pov_sim と同じ定義）
+    text_outer: 文字帯の外周半径[mm]（省略時は最大半径）
+    row_pitch / col_pitch: 文字の1ドットの半径方向 / 円周方向の大きさ[mm]（省略時はLEDの平均間隔）
+
+    文字は角度0を先頭に時計回りへ並び、上の行が外周側になる。
+    パネルを角度 a だけ回した表示はスロット方向の巡回シフトと同じなので、
+    文字の配置・スクロールや時計の針の回転は np.roll とビット演算だけで合成できる。
+    """
+
+    def __init__(self, r, theta, slots, text_outer=None, row_pitch=None, col_pitch=None,
+                 direction=1, font=FONT_5X7):
+        self.r = np.asarray(r, dtype=np.float64)
+        self.theta = np.asarray(theta, dtype=np.float64)
+        self.n = self.r.shape[0]
+        self.slots = slots
+        self.direction = direction
+        self.slot_angle = 2 * math.pi / slots
+        # スロット中央でのロータ角度と、各スロットでの各LEDの表示角度 (slots, N)
+        phi = direction * (np.arange(slots) + 0.5) * self.slot_angle
+        self.world_angle = (self.theta[None, :] + phi[:, None]) % (2 * math.pi)
+
+        spacing = math.sqrt(math.pi * self.r.max() ** 2 / self.n)
+        self.row_pitch = row_pitch or spacing
+        col_pitch = col_pitch or self.row_pitch
+        self.text_outer = text_outer or self.r.max()
+        self.text_inner = self.text_outer - FONT_ROWS * self.row_pitch
+        # 円周方向の1ドットはスロット数の整数倍にそろえる（文字送りを巡回シフトで正確に行うため）
+        r_mid = (self.text_outer + self.text_inner) / 2
+        self.col_slots = max(1, round(col_pitch / r_mid / self.slot_angle))
+        self.char_slots = self.col_slots * (FONT_COLS + 1)
+
+        # 文字セル内の行（LEDごと）と列（スロット・LEDごと）、範囲外は -1
+        row = np.floor((self.text_outer - self.r) / self.row_pitch).astype(np.int64)
+        row[(row < 0) | (row >= FONT_ROWS)] = -1
+        col = np.floor((-self.world_angle % (2 * math.pi)) / (self.col_slots * self.slot_angle)).astype(np.int64)
+        col[col >= FONT_COLS] = -1
+        valid = (row[None, :] >= 0) & (col >= 0)
+        self.glyphs = {}
+        for ch, columns in font.items():
+            bitmap = font_bitmap(columns)
+            self.glyphs[ch] = pack_bits(valid & bitmap[row[None, :], col])
+        self.shapes = {}
+
+    def shift(self, bits, angle):
+        # ビットセットの表示を角度 angle[rad]（反時計回りが正）だけ回す（スロット単位に丸める）
+        return np.roll(bits, int(round(self.direction * angle / self.slot_angle)), axis=0)
+
+    def glyph(self, ch):
+        return self.glyphs.get(ch.upper(), self.glyphs[' '])
+
+    def text_width(self, text):
+        # 文字列の角度幅[rad]
+        return len(text) * self.char_slots * self.slot_angle
+
+    def text(self, text, angle=None):
+        """
+        文字列のビットセット。angle は先頭の文字の左端の角度[rad]で、省略時は上（π/2）に中央寄せ。
+        1周より長い文字列は巡回して重なる。
+        """
+        if angle is None:
+            angle = math.pi / 2 + self.text_width(text) / 2
+        start = int(round(self.direction * angle / self.slot_angle))
+        bits = np.zeros_like(self.glyphs[' '])
+        for j, ch in enumerate(text):
+            if ch == ' ':
+                continue
+            bits |= np.roll(self.glyph(ch), start - self.direction * j * self.char_slots, axis=0)
+        return bits
+
+    def ring(self, r0, r1):
+        # 半径 r0～r1 の円環（全スロット同じ）
+        key = ('ring', r0, r1)
+        if key not in self.shapes:
+            mask = (self.r >= r0) & (self.r < r1)
+            self.shapes[key] = np.repeat(pack_bits(mask)[None, :], self.slots, axis=0)
+        return self.shapes[key]
+
+    def spoke(self, angle, r0, r1, width):
+        """
+        角度 angle の方向に半径 r0～r1、幅 width[mm] の線分（時計の針や目盛り）。
+        角度0の形状を一度だけ計算してキャッシュし、以降は巡回シフトで回す。
+        """
+        key = ('spoke', r0, r1, width)
+        if key not in self.shapes:
+            along = self.r[None, :] * np.cos(self.world_angle)
+            across = self.r[None, :] * np.sin(self.world_angle)
+            self.shapes[key] = pack_bits((along >= r0) & (along <= r1) & (np.abs(across) <= width / 2))
+        return self.shift(self.shapes[key], angle)
+
+    def clock(self, hours, minutes, seconds=None, radius=None):
+        # アナログ時計（12個の目盛りと時針・分針・秒針）
+        radius = radius or self.text_inner
+        w = self.row_pitch
+        key = ('dial', radius)
+        if key not in self.shapes:
+            self.shapes[key] = compose(*[self.spoke(math.pi / 2 - k * math.pi / 6, radius - 2 * w, radius, w)
+                                         for k in range(12)])
+        layers = [self.shapes[key]]
+        layers.append(self.spoke(math.pi / 2 - (hours % 12 + minutes / 60) * math.pi / 6, 0, 0.5 * radius, 1.5 * w))
+        layers.append(self.spoke(math.pi / 2 - minutes * math.pi / 30, 0, 0.8 * radius, w))
+        if seconds is not None:
+            layers.append(self.spoke(math.pi / 2 - seconds * math.pi / 30, 0, 0.9 * radius, 0.5 * w))
+        return compose(*layers)
+
+    def to_frames(self, bits, color=(255, 255, 255)):
+        # ビットセットを LED ID順のスロットフレーム (slots, N, 3) の uint8 に展開
+        mask = unpack_bits(bits, self.n)
+        return mask[..., None] * np.asarray(color, dtype=np.uint8)
+
+
+def main():
+    from .layout import SLOTS, build_layout
+    from .lut import chain_layout
+
+    # パラメータ設定（main.py と同じレイアウト、LED ID順）
+    slots = SLOTS
+    layout = build_layout()
+    r, theta, _, _ = chain_layout(layout['sector_paths'])
+
+    start = time.perf_counter()
+    atlas = GlyphAtlas(r, theta, slots)
+    print(f"Atlas: {len(atlas.glyphs)} glyphs x {slots} slots x {len(r)} LEDs in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms, {atlas.char_slots} slots per char")
+
+    # スクロールする文字列と時計を60秒分（1秒1フレーム）合成
+    ticker = atlas.text("MOVING DISPLAY 3")
+    atlas.clock(0, 0, 0)  # 針と目盛りの形状をキャッシュ
+    frames = 60
+    start = time.perf_counter()
+    for t in range(frames):
+        bits = compose(atlas.shift(ticker, -t * atlas.char_slots * atlas.slot_angle / 4),
+                       atlas.clock(10, 8, t))
+    elapsed = time.perf_counter() - start
+    print(f"Compose: {elapsed / frames * 1000:.3f} ms per frame, "
+          f"{int(np.unpackbits(bits.view(np.uint8)).sum())} lit LED-slots")
+
+    start = time.perf_counter()
+    led_frames = atlas.to_frames(bits, (255, 160, 0))
+    print(f"Expand to {led_frames.shape} frames: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import math
+
+from .polar_utils import (balanced_sector_path, continuous_sector_path, optimize_band_edges, path_stats,
+                          symmetrize_sector_paths)
+
+# パラメータ設定（Panel基板）
+N = 1200                # 点の総数
+COMP_PHY = 173          # 部品を配置する円の直径
+BOARD_PHI = 176         # 基板の直径
+ALPHA = math.pi * (3 - math.sqrt(5))  # 黄金角
+SECTORS = 6
+UNIT_CONST = 3.8
+SLOTS = 510             # 1回転あたりの表示スロット数（セクター数の倍数にしないと圧縮LUTのスロットオフセットが整数にならない）
+
+# ユニットごとの定数を設定
+#   footprint は JLCPCB BOM の Footprint 列と回転補正（output.JLCPCB_SETTINGS）のキー
+#   lcsc は JLCPCB BOM の LCSC Part # 列（空欄なら JLCPCB 側で部品を選ぶ）
+NEO_PIXEL = {
+    "quad_colors": ["#33eeee","#ff3333", "#eeee33", "#333333"],
+    "width": 2.2, "height": 3.2, "offset": 0,
+    "comment": "WS2812C-2020-V1", "footprint": "NeoPixel_WS2812C-2020-V1", "lcsc": ""
+}
+MLCC = {
+    "quad_colors": ["#ff9999", "#ff9999", "#9999ff", "#9999ff"],
+    "width": 1.1, "height": 2.0, "offset": -1.6,
+    "comment": "0.1uF", "footprint": "Capacitor_SMD_0402_1005Metric", "lcsc": ""
+}
+
+def generate_polar_points(N, R, alpha):
+    points = []
+    for i in range(1, N + 1):
+        # 半径は平方根スケーリングを適用
+        radius = R * math.sqrt(i / N)
+        # 角度は黄金角に基づく加算後に 2π で丸める
+        angle = (i * alpha) % (2 * math.pi)
+        points.append((radius, angle))
+    return points
+
+def build_layout(n=N, comp_phy=COMP_PHY, alpha=ALPHA, sectors=SECTORS, unit_const=UNIT_CONST,
+                 adaptive_bands=False, max_hop=None, symmetric=False, verbose=False):
+    """
+    点群を生成し、セクターの点数をそろえてチェーン（sector_paths）を作る。
+    adaptive_bands: True ならユニット境界を動的計画法で最適化してチェーンを短くし、
+                    固定幅(unit_const)との比較を表示する
+    max_hop: adaptive_bands で、点間距離がこれ[mm]を超える区切り方を除外する（optimize_band_edges）
+    symmetric: True ならセクター0のチェーンを回転複製した回転対称なレイアウトにする
+               （LUTを1/sectorsに圧縮できる。部品配置も変わるので出力はすべてこのレイアウトから作る）
+    返り値: {'polar_points', 'sector_paths', 'order_map', 'sector_counts', 'theta_offset',
+             'n', 'comp_phy', 'sectors', 'unit_const'}
+    """
+    # 極座標の点を生成
+    polar_points = generate_polar_points(n, comp_phy/2, alpha)
+
+    # theta_offsetの調整ループ: sector_countsの全要素が一致するまで実行
+    sector_paths, order_map, sector_counts, theta_offset = balanced_sector_path(
+        polar_points, sectors=sectors, unit_const=unit_const, verbose=verbose
+    )
+    if verbose:
+        print("Final theta_offset:", theta_offset)
+        print("Sector counts:", sector_counts)
+
+    if adaptive_bands:
+        # 固定幅(unit_const)のユニット分割と比較して、総延長と最大の点間距離を表示
+        # 扇形の割り当ては balanced_sector_path の結果をそのまま使う（境界の割り当て直しを含む）
+        sector_of = {pt: i for i, path in sector_paths.items() for pt in path}
+        band_edges = optimize_band_edges(polar_points, sectors, theta_offset, max_width=2*unit_const,
+                                         max_hop=max_hop, sector_of=sector_of)
+        adaptive_paths, adaptive_order, _ = continuous_sector_path(
+            polar_points, center=(0, 0), sectors=sectors, unit_const=unit_const,
+            theta_offset=theta_offset, band_edges=band_edges, sector_of=sector_of
+        )
+        for i in sorted(sector_paths):
+            fixed_len, fixed_hop = path_stats(sector_paths[i])
+            new_len, new_hop = path_stats(adaptive_paths[i])
+            print(f"Sector {i}: length {fixed_len:.1f} -> {new_len:.1f} mm "
+                  f"({(new_len - fixed_len) / fixed_len * 100:+.1f}%), max hop {fixed_hop:.2f} -> {new_hop:.2f} mm")
+        sector_paths, order_map = adaptive_paths, adaptive_order
+
+    if symmetric:
+        sector_paths, order_map = symmetrize_sector_paths(sector_paths, order_map, sectors)
+        polar_points = [pt for i in sorted(sector_paths) for pt in sector_paths[i]]
+        sector_counts = {i: len(path) for i, path in sector_paths.items()}
+
+    return {
+        'polar_points': polar_points,
+        'sector_paths': sector_paths,
+        'order_map': order_map,
+        'sector_counts': sector_counts,
+        'theta_offset': theta_offset,
+        'n': n,
+        'comp_phy': comp_phy,
+        'sectors': sectors,
+        'unit_const': unit_const,
+    }
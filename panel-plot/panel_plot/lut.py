@@ -0,0 +1,176 @@
+import math
+import numpy as np
+
+from .layout import SLOTS
+
+# WS2812 のプロトコルタイミング（800kHz、1LEDあたり24bit）
+WS2812_BIT_TIME = 1.25e-6
+BITS_PER_LED = 24
+
+
+def chain_layout(sector_paths):
+    """
+    sector_paths をID順（neopixel_coordinates.h と同じ並び）の配列に展開する。
+    返り値: r, theta, sector（セクター番号）, position（チェーン内の位置、先頭が0）
+    """
+    r, theta, sector, position = [], [], [], []
+    for s, path in sorted(sector_paths.items()):
+        for k, (pr, ptheta) in enumerate(path):
+            r.append(pr)
+            theta.append(ptheta)
+            sector.append(s)
+            position.append(k)
+    return (np.array(r), np.array(theta),
+            np.array(sector, dtype=np.int32), np.array(position, dtype=np.int32))
+
+
+def chain_delay_angle(position, rpm, bit_time=WS2812_BIT_TIME, bits_per_led=BITS_PER_LED):
+    """
+    チェーン内の位置 position のLEDが先頭LEDより遅れて点灯する間に
+    ロータが回転する角度[rad]を返す。
+    N番目のLEDにデータが届くのは先頭から N × bits_per_led ビット時間後。
+    """
+    delay = np.asarray(position, dtype=np.float64) * bits_per_led * bit_time
+    return 2 * np.pi * rpm / 60.0 * delay
+
+
+def build_slot_lut(r, theta, slots, size, extent, direction=1, angle_offset=None):
+    """
+    スロットごとに各LEDが表示すべき元画像の画素番号（row * size + col）を返す。
+    元画像は [-extent, extent] の正方形を size × size 画素で表したもの。
+    angle_offset: LEDごとの追加の回転角[rad]（チェーン遅延の補償に使う）。
+                  遅れて点灯するLEDはロータが回転した先の位置に表示されるので、
+                  その位置の画素を参照させる。
+    返り値: (slots, N) の uint16/uint32 配列
+    """
+    r = np.asarray(r, dtype=np.float64)
+    theta = np.asarray(theta, dtype=np.float64)
+    if angle_offset is not None:
+        theta = theta + direction * np.asarray(angle_offset, dtype=np.float64)
+    # スロット中央でのロータ角度
+    phi = direction * (np.arange(slots) + 0.5) * (2 * np.pi / slots)
+    angle = theta[None, :] + phi[:, None]
+    x = r[None, :] * np.cos(angle)
+    y = r[None, :] * np.sin(angle)
+    col = np.clip(((x + extent) / (2 * extent) * size).astype(np.int64), 0, size - 1)
+    # 画像の行は上から下なのでYを反転
+    row = np.clip(((extent - y) / (2 * extent) * size).astype(np.int64), 0, size - 1)
+    dtype = np.uint16 if size * size <= 0x10000 else np.uint32
+    return (row * size + col).astype(dtype)
+
+
+def build_compensated_lut(sector_paths, slots, size, extent, rpm, direction=1,
+                          bit_time=WS2812_BIT_TIME, bits_per_led=BITS_PER_LED):
+    """
+    チェーン遅延を補償したスロットLUTを作る。
+    返り値: lut (slots, N), delay（LEDごとの遅延角[rad]、ID順）
+    """
+    r, theta, _, position = chain_layout(sector_paths)
+    delay = chain_delay_angle(position, rpm, bit_time, bits_per_led)
+    lut = build_slot_lut(r, theta, slots, size, extent, direction, angle_offset=delay)
+    return lut, delay
+
+
+def detect_sector_symmetry(sector_paths, sectors):
+    """
+    各セクターのチェーンが、セクター0のチェーンを j × (2π/sectors) 回転したものと
+    同じ並びになっているかを調べる。
+    返り値: {セクター番号: チェーン位置ごとの最大ずれ[mm]}（点数が違う場合は inf）
+    """
+    sector_angle = 2 * math.pi / sectors
+    base = np.array(sector_paths[0], dtype=np.float64)
+    deviation = {}
+    for j, path in sorted(sector_paths.items()):
+        pts = np.array(path, dtype=np.float64)
+        if pts.shape != base.shape:
+            deviation[j] = math.inf
+            continue
+        # セクター0の点を回転させた位置との直交座標での距離
+        angle = base[:, 1] + j * sector_angle
+        dx = pts[:, 0] * np.cos(pts[:, 1]) - base[:, 0] * np.cos(angle)
+        dy = pts[:, 0] * np.sin(pts[:, 1]) - base[:, 0] * np.sin(angle)
+        deviation[j] = float(np.hypot(dx, dy).max()) if len(pts) else 0.0
+    return deviation
+
+
+def compress_lut(lut, sector, slots, sectors, direction=1):
+    """
+    セクター間の回転対称性を使ってLUTを圧縮する。
+    セクター j のLEDはスロット s で、セクター0の同じチェーン位置のLEDが
+    スロット s + j × slots/sectors で表示する画素と同じ画素を表示するので、
+    セクター0の列とセクターごとのスロットオフセットだけを保存する。
+    lut: (slots, N)、sector: ID順のセクター番号
+    返り値: {'base': (slots, セクター0のLED数), 'slot_offsets': (sectors,)}
+    """
+    base_ids = np.flatnonzero(sector == 0)
+    offsets = np.array([direction * round(j * slots / sectors) % slots for j in range(sectors)],
+                       dtype=np.int32)
+    return {'base': lut[:, base_ids].copy(), 'slot_offsets': offsets}
+
+
+def expand_lut(compressed, sector, position):
+    """
+    圧縮したLUTから (slots, N) の完全なLUTを復元する。
+    LED i の値は base[(s + slot_offsets[sector[i]]) % slots, position[i]]。
+    """
+    base = compressed['base']
+    slots = base.shape[0]
+    s = np.arange(slots)[:, None]
+    rows = (s + compressed['slot_offsets'][sector][None, :]) % slots
+    return base[rows, position[None, :]]
+
+
+def verify_compressed_lut(compressed, lut, sector, position, size):
+    """
+    圧縮LUTを復元して元のLUTと比較する。
+    返り値: {'mismatches': 不一致の要素数, 'ratio': 不一致の割合,
+             'max_pixel_error': 参照画素の最大ずれ（画素単位）}
+    """
+    expanded = expand_lut(compressed, sector, position).astype(np.int64)
+    full = lut.astype(np.int64)
+    diff = expanded != full
+    if diff.any():
+        dr = expanded[diff] // size - full[diff] // size
+        dc = expanded[diff] % size - full[diff] % size
+        max_error = float(np.hypot(dr, dc).max())
+    else:
+        max_error = 0.0
+    return {
+        'mismatches': int(diff.sum()),
+        'ratio': float(diff.mean()),
+        'max_pixel_error': max_error,
+    }
+
+
+def export_lut(layout, slots=SLOTS, size=128, rpm=1200, out_dir=None):
+    """
+    build_layout の結果からチェーン遅延を補正したスロットLUTを作り、slot_lut.mem に出力する。
+    セクター対称（build_layout(symmetric=True)）なら圧縮LUTを検証して出力し、
+    そうでなければ完全なLUTを出力する。LUTは基板と同じレイアウトからしか作らない。
+    """
+    from .output import export_slot_lut_mem
+
+    sector_paths, sectors = layout['sector_paths'], layout['sectors']
+    lut, delay = build_compensated_lut(sector_paths, slots, size, layout['comp_phy']/2, rpm)
+    slot_angle = 2 * math.pi / slots
+    print(f"Max chain delay: {math.degrees(delay.max()):.2f} deg ({delay.max() / slot_angle:.2f} slots) at {rpm} rpm")
+
+    # セクター対称性の検出と圧縮LUTの検証
+    deviation = detect_sector_symmetry(sector_paths, sectors)
+    print("Sector deviation [mm]:", {j: round(d, 3) for j, d in deviation.items()})
+    _, _, sector, position = chain_layout(sector_paths)
+    compressed = compress_lut(lut, sector, slots, sectors)
+    result = verify_compressed_lut(compressed, lut, sector, position, size)
+    print(f"Compressed LUT: {compressed['base'].nbytes} / {lut.nbytes} bytes, verify: {result}")
+    if result['mismatches'] == 0:
+        export_slot_lut_mem(compressed['base'], compressed['slot_offsets'], out_dir=out_dir)
+    else:
+        export_slot_lut_mem(lut, out_dir=out_dir)
+    return lut
+
+def main(out_dir=None):
+    from .layout import build_layout
+    export_lut(build_layout(), out_dir=out_dir)
+
+if __name__ == '__main__':
+    main()
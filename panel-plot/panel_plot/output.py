@@ -2,9 +2,19 @@ import csv
 import math
 import os
 
-def export_units(sector_paths, order_map, neo_pixel, mlcc):
-    neo_rows = []
-    mlcc_rows = []
+def output_dir(out_dir=None):
+    """出力先ディレクトリを返す（省略時はカレントディレクトリ、無ければ作成）"""
+    if out_dir is None:
+        return os.getcwd()
+    os.makedirs(out_dir, exist_ok=True)
+    return out_dir
+
+def iter_units(sector_paths, order_map, neo_pixel, mlcc):
+    """
+    セクター順に各点のNeoPixel/MLCCの配置を1つずつ返すジェネレータ。
+    返す値: (部品種別 'neopixel'/'mlcc', sector_label, x, y, rotation_degrees)
+    x, y, rotation は計算座標系の生の値（Y反転・回転補正は出力側で行う）。
+    """
     for sector, points in sorted(sector_paths.items()):
         # Sectorの値を "Sector0" のような文字列と仮定し、数字部分から文字を生成
         letter = chr(65 + sector)
@@ -13,37 +23,100 @@ def export_units(sector_paths, order_map, neo_pixel, mlcc):
             order = order_map.get((r, theta))
             rotation = theta + math.pi if order == "ascending" else theta
             rotation_degrees = math.degrees(rotation)
-            np_x = (r + neo_pixel["offset"]) * math.cos(theta)
-            np_y = (r + neo_pixel["offset"]) * math.sin(theta)
             # ラベルは例: "A0", "A1", ... または "B0", "B1", ...
             sector_label = f"{letter}{sector_counter}"
             sector_counter += 1
-            neo_rows.append([np_x, -np_y, rotation_degrees+90, sector_label])
+            np_x = (r + neo_pixel["offset"]) * math.cos(theta)
+            np_y = (r + neo_pixel["offset"]) * math.sin(theta)
+            yield "neopixel", sector_label, np_x, np_y, rotation_degrees
             mlcc_x = (r + mlcc["offset"]) * math.cos(theta)
             mlcc_y = (r + mlcc["offset"]) * math.sin(theta)
-            mlcc_rows.append([mlcc_x, -mlcc_y, rotation_degrees+270, sector_label])
-    # CSV出力: NeoPixel用
-    output_file_np = os.path.join(os.path.dirname(__file__), 'units_neopixel.csv')
-    with open(output_file_np, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['ID', 'Part Number', 'x', 'y', 'rotation', 'sector'])
-        id_counter = 1
-        for row in neo_rows:
-            part_number = f"D{id_counter}"
-            writer.writerow([id_counter, part_number] + row)
-            id_counter += 1
-    # CSV出力: MLCC用
-    output_file_mlcc = os.path.join(os.path.dirname(__file__), 'units_mlcc.csv')
-    with open(output_file_mlcc, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['ID', 'Part Number', 'x', 'y', 'rotation', 'sector'])
-        id_counter = 1
-        for row in mlcc_rows:
-            part_number = f"C{id_counter}"
-            writer.writerow([id_counter, part_number] + row)
-            id_counter += 1
+            yield "mlcc", sector_label, mlcc_x, mlcc_y, rotation_degrees
+
+# units_*.csv 用の部品ごとの設定（リファレンス接頭辞、回転補正）
+UNIT_CSV_SETTINGS = {
+    "neopixel": {"prefix": "D", "rotation": 90},
+    "mlcc": {"prefix": "C", "rotation": 270},
+}
+
+# JLCPCB CPL/BOM出力の既定設定
+#   origin: 基板原点（計算座標系でのmm）。CPLの座標はこの点からの相対値
+#   rotation: フットプリント名ごとの回転補正（度）。フットプリントの向きとJLCPCBの基準向きの差
+#             （ここに無いフットプリントは補正0）
+#   flip_y: Y軸を反転する（X軸について鏡像にするので回転角も反転する）。
+#           JLCPCB の CPL は KiCad の .pos 出力と同じ Y 上向きで、計算座標系も Y 上向きなので既定は反転しない
+#           （units_*.csv の Y 反転は KiCad 内部の Y 下向き座標用）
+JLCPCB_SETTINGS = {
+    "origin": (0.0, 0.0),
+    "rotation": {"NeoPixel_WS2812C-2020-V1": 90, "Capacitor_SMD_0402_1005Metric": 270},
+    "flip_y": False,
+    "layer": "Top",
+}
+
+def export_units(sector_paths, order_map, neo_pixel, mlcc, jlcpcb=None, out_dir=None):
+    """
+    units_neopixel.csv / units_mlcc.csv を出力する。
+    jlcpcb に設定辞書（JLCPCB_SETTINGS と同じ形式、省略キーは既定値）を渡すと、
+    同じ1回の走査で JLCPCB 形式の CPL と BOM も出力する。
+    行はリストに溜めずに逐次書き出す。
+    out_dir: 出力先ディレクトリ（省略時はカレントディレクトリ）
+    """
+    base_dir = output_dir(out_dir)
+    units = {"neopixel": neo_pixel, "mlcc": mlcc}
+    files = []
+    try:
+        # CSV出力: NeoPixel用 / MLCC用
+        writers = {}
+        for kind, filename in [("neopixel", 'units_neopixel.csv'), ("mlcc", 'units_mlcc.csv')]:
+            f = open(os.path.join(base_dir, filename), 'w', newline='')
+            files.append(f)
+            writers[kind] = csv.writer(f)
+            writers[kind].writerow(['ID', 'Part Number', 'x', 'y', 'rotation', 'sector'])
+        cpl_writer = None
+        if jlcpcb is not None:
+            settings = {**JLCPCB_SETTINGS, **jlcpcb}
+            settings["rotation"] = {**JLCPCB_SETTINGS["rotation"], **jlcpcb.get("rotation", {})}
+            origin_x, origin_y = settings["origin"]
+            y_sign = -1 if settings["flip_y"] else 1
+            f = open(os.path.join(base_dir, 'jlcpcb_cpl.csv'), 'w', newline='')
+            files.append(f)
+            cpl_writer = csv.writer(f)
+            cpl_writer.writerow(['Designator', 'Mid X', 'Mid Y', 'Layer', 'Rotation'])
+            bom_designators = {kind: [] for kind in units}
 
-def export_neopixel_c_header(sector_paths, order_map, neo_pixel):
+        id_counters = {kind: 0 for kind in units}
+        for kind, sector_label, x, y, rotation_degrees in iter_units(sector_paths, order_map, neo_pixel, mlcc):
+            id_counters[kind] += 1
+            id_counter = id_counters[kind]
+            part_number = f"{UNIT_CSV_SETTINGS[kind]['prefix']}{id_counter}"
+            writers[kind].writerow([id_counter, part_number, x, -y,
+                                    rotation_degrees + UNIT_CSV_SETTINGS[kind]["rotation"], sector_label])
+            if cpl_writer is not None:
+                cpl_rotation = (y_sign * rotation_degrees
+                                + settings["rotation"].get(units[kind].get("footprint"), 0)) % 360
+                cpl_writer.writerow([part_number,
+                                     f"{x - origin_x:.4f}mm",
+                                     f"{y_sign * (y - origin_y):.4f}mm",
+                                     settings["layer"],
+                                     f"{cpl_rotation:.2f}"])
+                bom_designators[kind].append(part_number)
+    finally:
+        for f in files:
+            f.close()
+
+    if jlcpcb is not None:
+        # BOM出力: 部品種別ごとに1行
+        output_file_bom = os.path.join(base_dir, 'jlcpcb_bom.csv')
+        with open(output_file_bom, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Comment', 'Designator', 'Footprint', 'LCSC Part #'])
+            for kind, designators in bom_designators.items():
+                unit = units[kind]
+                writer.writerow([unit.get("comment", kind), ",".join(designators),
+                                 unit.get("footprint", ""), unit.get("lcsc", "")])
+        print(f"JLCPCB用CPL/BOMを出力しました: {os.path.join(base_dir, 'jlcpcb_cpl.csv')}, {output_file_bom}")
+
+def export_neopixel_c_header(sector_paths, order_map, neo_pixel, out_dir=None):
     """NeoPixelの座標とIDを統合されたC言語ヘッダーファイルとして出力（int16_t形式）"""
     neo_data = []
     
@@ -87,7 +160,7 @@ def export_neopixel_c_header(sector_paths, order_map, neo_pixel):
         theta_min, theta_max = min(theta_values), max(theta_values)
     
     # C言語の統合ヘッダーファイルとして出力
-    output_file_h = os.path.join(os.path.dirname(__file__), 'neopixel_coordinates.h')
+    output_file_h = os.path.join(output_dir(out_dir), 'neopixel_coordinates.h')
     with open(output_file_h, 'w') as f:
         f.write("#ifndef NEOPIXEL_COORDINATES_H\n")
         f.write("#define NEOPIXEL_COORDINATES_H\n\n")
@@ -157,9 +230,59 @@ def export_neopixel_c_header(sector_paths, order_map, neo_pixel):
     print(f"統合C言語ヘッダーファイル（int16_t形式）を出力しました: {output_file_h}")
     return neo_data
 
-def export_neopixel_c_source(neo_data):
+def export_neopixel_brightness_header(neo_data, gains, gamma, gamma_value, pwm_bits, out_dir=None):
+    """NeoPixelごとの輝度補正ゲインとガンマ補正テーブルをC言語ヘッダーファイルとして出力"""
+    gamma_type = "uint8_t" if pwm_bits <= 8 else "uint16_t"
+    output_file_h = os.path.join(output_dir(out_dir), 'neopixel_brightness.h')
+    with open(output_file_h, 'w') as f:
+        f.write("#ifndef NEOPIXEL_BRIGHTNESS_H\n")
+        f.write("#define NEOPIXEL_BRIGHTNESS_H\n\n")
+        f.write("#include <stdint.h>\n\n")
+        f.write("// NeoPixel輝度補正データ\n")
+        f.write("// 自動生成されたファイル - 手動で編集しないでください\n")
+        f.write("// IDの並びは neopixel_coordinates.h と同じ\n")
+        f.write("//\n")
+        f.write("// neopixel_gain: 半径方向の密度むらを打ち消す光量のゲイン（255 = 1.0）\n")
+        f.write(f"//   範囲: {min(gains)} ~ {max(gains)}\n")
+        f.write(f"// neopixel_gamma: 8bit入力 -> {pwm_bits}bit PWM のガンマ補正テーブル (gamma = {gamma_value})\n")
+        f.write("//\n")
+        f.write("// 適用例（ゲインは光量に比例させるため、ガンマ補正後のPWM値に掛ける）:\n")
+        f.write("//   pwm = (neopixel_gamma[value] * (neopixel_gain[id] + 1)) >> 8\n\n")
+
+        f.write(f"#define NEOPIXEL_GAIN_COUNT {len(gains)}\n")
+        f.write(f"#define NEOPIXEL_PWM_BITS {pwm_bits}\n\n")
+
+        f.write("static const uint8_t neopixel_gain[NEOPIXEL_GAIN_COUNT] = {\n    ")
+        values = [f"{g:3d}" for g in gains]
+        # 20個ずつで改行
+        for i in range(0, len(values), 20):
+            if i > 0:
+                f.write(",\n    ")
+            f.write(", ".join(values[i:i+20]))
+        f.write("\n};\n\n")
+
+        f.write(f"static const {gamma_type} neopixel_gamma[256] = {{\n    ")
+        values = [f"{g:{len(str((1 << pwm_bits) - 1))}d}" for g in gamma]
+        for i in range(0, len(values), 16):
+            if i > 0:
+                f.write(",\n    ")
+            f.write(", ".join(values[i:i+16]))
+        f.write("\n};\n\n")
+
+        f.write("static inline uint16_t neopixel_apply_brightness(int16_t id, uint8_t value) {\n")
+        f.write("    if (id < 0 || id >= NEOPIXEL_GAIN_COUNT) {\n")
+        f.write("        return 0;\n")
+        f.write("    }\n")
+        f.write("    return (uint16_t)(((uint32_t)neopixel_gamma[value] * (neopixel_gain[id] + 1)) >> 8);\n")
+        f.write("}\n\n")
+
+        f.write("#endif // NEOPIXEL_BRIGHTNESS_H\n")
+
+    print(f"輝度補正ヘッダーファイルを出力しました: {output_file_h}")
+
+def export_neopixel_c_source(neo_data, out_dir=None):
     """NeoPixel用のC言語ソースファイルを出力（便利な関数の実装、int16_t形式）"""
-    output_file_c = os.path.join(os.path.dirname(__file__), 'neopixel_coordinates.c')
+    output_file_c = os.path.join(output_dir(out_dir), 'neopixel_coordinates.c')
     with open(output_file_c, 'w') as f:
         f.write('#include "neopixel_coordinates.h"\n')
         f.write('#include <stddef.h>\n')
@@ -180,7 +303,7 @@ def export_neopixel_c_source(neo_data):
     
     print(f"C言語ソースファイル（int16_t形式）を出力しました: {output_file_c}")
 
-def export_neopixel_c_arrays(sector_paths, order_map, neo_pixel):
+def export_neopixel_c_arrays(sector_paths, order_map, neo_pixel, out_dir=None):
     """NeoPixelの座標をC言語の配列形式で出力（int16_t形式）"""
     neo_data = []
     
@@ -210,7 +333,7 @@ def export_neopixel_c_arrays(sector_paths, order_map, neo_pixel):
             sector_counter += 1
     
     # C言語の配列として出力
-    output_file_arrays = os.path.join(os.path.dirname(__file__), 'neopixel_arrays.c')
+    output_file_arrays = os.path.join(output_dir(out_dir), 'neopixel_arrays.c')
     with open(output_file_arrays, 'w') as f:
         f.write("// NeoPixel座標データ - C言語配列形式（int16_t）\n")
         f.write("// 自動生成されたファイル - 手動で編集しないでください\n")
@@ -265,6 +388,30 @@ def export_neopixel_c_arrays(sector_paths, order_map, neo_pixel):
     print(f"C言語配列ファイル（int16_t形式）を出力しました: {output_file_arrays}")
     return neo_data
 
+def export_slot_lut_mem(lut, slot_offsets=None, out_dir=None):
+    """
+    スロットLUTをFPGA用の $readmemh 形式で出力（1行1要素、スロット順 -> ID順）
+    slot_offsets を渡した場合は lut を1セクター分の圧縮LUTとみなし、
+    セクターごとのスロットオフセットを slot_offsets.mem に出力する。
+    """
+    slots, count = lut.shape
+    digits = 4 if lut.dtype.itemsize <= 2 else 8
+    output_file_mem = os.path.join(output_dir(out_dir), 'slot_lut.mem')
+    with open(output_file_mem, 'w') as f:
+        kind = "per-sector" if slot_offsets is not None else "full"
+        f.write(f"// slot LUT ({kind}): {slots} slots x {count} NeoPixels, source pixel index\n")
+        for slot_row in lut:
+            f.write("\n".join(f"{v:0{digits}x}" for v in slot_row.tolist()))
+            f.write("\n")
+    print(f"スロットLUTを出力しました: {output_file_mem}")
+    if slot_offsets is not None:
+        output_file_offsets = os.path.join(output_dir(out_dir), 'slot_offsets.mem')
+        with open(output_file_offsets, 'w') as f:
+            f.write(f"// slot offset per sector ({len(slot_offsets)} sectors)\n")
+            f.write("\n".join(f"{int(v):04x}" for v in slot_offsets))
+            f.write("\n")
+        print(f"セクターごとのスロットオフセットを出力しました: {output_file_offsets}")
+
 if __name__ == '__main__':
     # テスト用コード
     export_units({}, {}, {}, {})
@@ -1,18 +1,9 @@
 import math
 import matplotlib.pyplot as plt
 from matplotlib.collections import PatchCollection
-from polar_utils import continuous_sector_path
 from matplotlib.patches import Polygon
 
-def generate_polar_points(N, R, alpha):
-    points = []
-    for i in range(1, N + 1):
-        # 半径は平方根スケーリングを適用
-        radius = R * math.sqrt(i / N)
-        # 角度は黄金角に基づく加算後に 2π で丸める
-        angle = (i * alpha) % (2 * math.pi)
-        points.append((radius, angle))
-    return points
+from .layout import BOARD_PHI, NEO_PIXEL, MLCC
 
 def plot_sector_boundaries(R, sectors, ax=None):
     # 扇形の境界線を描画
@@ -104,14 +95,15 @@ def draw_units(ax, r, theta, neo, mlcc, order, label_np, label_ml):
     )
     return units
 
-def main():
-    # パラメータ設定
-    N =1200         # 点の総数
-    comp_phy = 173   # 円の半径
-    board_phi = 176  # 円の半径
-    alpha = math.pi * (3 - math.sqrt(5))
-    sectors = 6
-    unit_const = 3.8
+def plot_layout(layout, board_phi=BOARD_PHI, neo_pixel=NEO_PIXEL, mlcc=MLCC):
+    """build_layout の結果（点、ユニット、各扇形のパス）を描画して表示する"""
+    N = layout['n']
+    comp_phy = layout['comp_phy']
+    sectors = layout['sectors']
+    unit_const = layout['unit_const']
+    polar_points = layout['polar_points']
+    sector_paths = layout['sector_paths']
+    order_map = layout['order_map']
 
     #-------------------------------------------------------------------------------------------
     # FigureとAxesを初期化
@@ -132,42 +124,9 @@ def main():
         ax.add_artist(circle_ring)
         k += 1
 
-    #-------------------------------------------------------------------------------------------
-    # 極座標の点を生成
-    polar_points = generate_polar_points(N, comp_phy/2, alpha)
-    
-    # theta_offsetの調整ループ: sector_countsの全要素が一致するまで実行
-    theta_offset = 0.0
-    while True:
-        sector_paths, order_map, sector_counts = continuous_sector_path(
-            polar_points, center=(0, 0), sectors=sectors, unit_const=unit_const, theta_offset=theta_offset
-        )
-        print("Current theta_offset:", theta_offset, sector_counts)
-        if len(set(sector_counts.values())) == 1:
-            break
-        theta_offset += 0.01
-        if theta_offset > 2*math.pi:
-            break
-    print("Final theta_offset:", theta_offset)
-    print("Sector counts:", sector_counts)
-
     # 扇形の境界線を描画
     plot_sector_boundaries(board_phi/2.0, sectors, ax)
     
-    # ユニットごとの定数を設定
-    neo_pixel = {
-        "quad_colors": ["#33eeee","#ff3333", "#eeee33", "#333333"],
-        "width": 2.2, "height": 3.2, "offset": 0
-    }
-    mlcc = {
-        "quad_colors": ["#ff9999", "#ff9999", "#9999ff", "#9999ff"],
-        "width": 1.1, "height": 2.0, "offset": -1.6
-    }
-    
-    # CSV出力部分（CSV書き出し処理は output.py に実装）
-    from output import export_units
-    export_units(sector_paths, order_map, neo_pixel, mlcc)
-    
     # ユニット (NeoPixel, MLCC) を全ての極座標点で描画
     all_rectangles = []
     for idx, (r, theta) in enumerate(polar_points):
@@ -200,7 +159,3 @@ def main():
     plt.grid(True)
     plt.legend()
     plt.show()
-
-if __name__ == '__main__':
-    main()
-
@@ -0,0 +1,357 @@
+import bisect
+import math
+
+def polar_to_cartesian(point):
+    # (r, theta) を (x, y) に変換
+    r, theta = point
+    return (r * math.cos(theta), r * math.sin(theta))
+
+def euclidean_distance(p1, p2):
+    x1, y1 = polar_to_cartesian(p1)
+    x2, y2 = polar_to_cartesian(p2)
+    return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
+
+def greedy_path(points):
+    # points: [(r, theta), ...]
+    # グリーディ法で点を最短距離順に並べる
+    if not points:
+        return []
+    remaining = points[:]
+    path = [remaining.pop(0)]
+    while remaining:
+        current = path[-1]
+        next_point = min(remaining, key=lambda p: euclidean_distance(current, p))
+        path.append(next_point)
+        remaining.remove(next_point)
+    return path
+
+def classify_sectors(polar_points, sectors, theta_offset=0, sector_of=None):
+    """
+    点群を theta_offset だけ回転させた角度で扇形(sectors)ごとに分類し、
+    各扇形内を内側から外側にソートして返す。
+    sector_of: {(r, theta): 扇形番号} を渡すと角度の代わりにその割り当てを使う
+               （reassign_sectors の結果）。0/2π の境界を越えて隣の扇形へ移された点は、
+               adjusted_theta を ±2π して割り当て先の扇形の角度範囲の側に置く
+    返り値: {扇形番号: [{'point', 'r', 'theta', 'adjusted_theta'}, ...]}
+    """
+    # 扇形1つあたりの角度
+    sector_angle = 2 * math.pi / sectors
+    # 各扇形での点リストを初期化
+    sectors_points = {i: [] for i in range(sectors)}
+    # 1. 各点を極座標に基づき各扇形に分類（adjusted_thetaを保存）
+    for (r, theta) in polar_points:
+        # theta_offsetを反映
+        adjusted_theta = (theta + theta_offset) % (2 * math.pi)
+        if sector_of is not None:
+            index = sector_of[(r, theta)]
+            # 扇形の中心から ±π の範囲に展開（2π付近の点を扇形0の先頭側へ、0付近の点を最後の扇形の末尾側へ）
+            center = (index + 0.5) * sector_angle
+            adjusted_theta += 2 * math.pi * round((center - adjusted_theta) / (2 * math.pi))
+        else:
+            index = int(adjusted_theta // sector_angle)
+        if index >= sectors:
+            index = sectors - 1
+        sectors_points[index].append({'point': (r, theta), 'r': r, 'theta': theta, 'adjusted_theta': adjusted_theta})
+    # 2. 各扇形内を内側から外側にソート
+    for i in range(sectors):
+        sectors_points[i].sort(key=lambda p: p['r'])
+    return sectors_points
+
+def continuous_sector_path(polar_points, center=(0, 0), sectors=0, unit_const=0, theta_offset=0, band_edges=None,
+                           sector_of=None):
+    """
+    極座標の点群(polar_points: [(r, theta), ...])を入力し、
+    中心との距離により内側～外側の順にソート後、
+    指定した扇形(sectors)ごとに分類して各扇形内のパスを返す。
+    各扇形は半径unit_constでユニットに分割され、
+    最も内側のユニットはθの昇順、その外側は降順と交互に点を結ぶ。
+    theta_offset: セクター分割基準となるθ値の回転オフセット
+    band_edges: {扇形番号: [ユニット境界の半径, ...]} を渡すと、unit_const の
+                固定幅の代わりにその境界でユニットに分割する（optimize_band_edges の結果）
+    sector_of: {(r, theta): 扇形番号} を渡すと角度による分類の代わりに使う（reassign_sectors の結果）
+    """
+    sectors_points = classify_sectors(polar_points, sectors, theta_offset, sector_of)
+    # 各扇形ごとのパスを生成
+    sector_paths = {}
+    order_map = {}  # 各点のcurrent_orderを保存する
+    for i in range(sectors):
+        # ptは ( (r, theta), adjusted_theta )
+        pts = [(p['point'], p['adjusted_theta']) for p in sectors_points[i]]
+        # ユニット毎に点を分割（unit_constごと）
+        units = {}
+        for pt, adj_theta in pts:
+            r, _ = pt
+            if band_edges is not None:
+                unit_key = bisect.bisect_right(band_edges[i], r)
+            else:
+                unit_key = int(r // unit_const)
+            units.setdefault(unit_key, []).append((pt, adj_theta))
+        # 各ユニット内の並びを、adjusted_thetaを使ってソート
+        ordered_units = []
+        prev_order = None
+        for idx, key in enumerate(sorted(units.keys())):
+            unit_points = units[key]
+            unit_points.sort(key=lambda item: item[1])
+            if idx == 0:
+                # 最も内側のユニット：θ昇順でソート後、rの先頭と末尾を比較して順序調整
+                if unit_points[0][0][0] > unit_points[-1][0][0]:
+                    unit_points.reverse()
+                    current_order = "descending"
+                else:
+                    current_order = "ascending"
+            else:
+                # 前のユニットの順序と反対にする
+                if prev_order == "ascending":
+                    unit_points.reverse()
+                    current_order = "descending"
+                else:
+                    current_order = "ascending"
+            # 各点にソート順を付与
+            for pt, adj_theta in unit_points:
+                ordered_units.append(pt)
+                order_map[pt] = current_order
+            prev_order = current_order
+        sector_paths[i] = ordered_units
+    # 各セクターの要素数を計算
+    sector_counts = {i: len(paths) for i, paths in sector_paths.items()}
+    return sector_paths, order_map, sector_counts  # 返り値を更新
+
+def reassign_sectors(polar_points, sectors, theta_offset=0):
+    """
+    theta_offset で回転させた後、境界付近の点を隣の扇形へ移して
+    全扇形の点数を N/sectors（割り切れない分は先頭の扇形から1つずつ多く）にそろえる。
+    点を角度順に並べると、点数をそろえた分け方は「角度順に連続した区間」に限られ、
+    区間の切れ目の位置だけが自由度になる。扇形の角度範囲からはみ出した点の
+    はみ出し角の合計が最小になる切れ目を、累積和を使って全候補について求める。
+    計算量は並べ替えの O(N log N)。
+    返り値: {(r, theta): 扇形番号}, はみ出し角の最大値[rad]
+    """
+    two_pi = 2 * math.pi
+    sector_angle = two_pi / sectors
+    n = len(polar_points)
+    order = sorted(range(n), key=lambda k: (polar_points[k][1] + theta_offset) % two_pi)
+    angles = [(polar_points[k][1] + theta_offset) % two_pi for k in order]
+    # 1周前後をつなげた角度列（境界0/2πをまたぐ切れ目を扱うため）
+    ext = [a - two_pi for a in angles] + angles + [a + two_pi for a in angles]
+    sizes = [n // sectors + (1 if k < n % sectors else 0) for k in range(sectors)]
+    starts = [sum(sizes[:k]) for k in range(sectors)]
+    # 角度による本来の境界位置（境界 k*sector_angle より小さい点の数）
+    natural = [bisect.bisect_left(angles, k * sector_angle) for k in range(sectors)]
+    # 境界 k からの角度差の累積和
+    prefix = []
+    for k in range(sectors):
+        boundary = k * sector_angle
+        acc = [0.0]
+        for a in ext:
+            acc.append(acc[-1] + abs(a - boundary))
+        prefix.append(acc)
+
+    def cost(c):
+        # 切れ目を c ずらしたとき、本来の境界と新しい境界の間にある点のはみ出し角の合計
+        return sum(abs(prefix[k][n + c + starts[k]] - prefix[k][n + natural[k]]) for k in range(sectors))
+
+    span = max(sizes)
+    best_c = min(range(-span, span + 1), key=cost)
+    sector_of = {}
+    max_deviation = 0.0
+    for k in range(sectors):
+        lo = n + best_c + starts[k]
+        for pos in range(lo, lo + sizes[k]):
+            point = polar_points[order[pos % n]]
+            sector_of[point] = k
+            # 扇形 k の角度範囲からのはみ出し
+            a = ext[pos]
+            deviation = max(0.0, k * sector_angle - a, a - (k + 1) * sector_angle)
+            max_deviation = max(max_deviation, deviation)
+    return sector_of, max_deviation
+
+def balanced_sector_path(polar_points, sectors, unit_const, step=0.01, verbose=False):
+    """
+    theta_offset を step ずつ回転させながら continuous_sector_path を実行し、
+    全セクターの点数が一致した時点の結果を返す。
+    2π まで回しても一致しなければ、点数の差が最も小さかった theta_offset で
+    reassign_sectors により境界付近の点を移して点数をそろえる。
+    点数がセクター数で割り切れない場合は回転では一致しないので、探索せずに
+    theta_offset = 0 で reassign_sectors を使う。
+    返り値: sector_paths, order_map, sector_counts, theta_offset
+    """
+    divisible = len(polar_points) % sectors == 0
+    theta_offset = 0.0
+    best = (math.inf, 0.0)  # (点数の差, theta_offset)
+    while divisible and theta_offset <= 2*math.pi:
+        sector_paths, order_map, sector_counts = continuous_sector_path(
+            polar_points, center=(0, 0), sectors=sectors, unit_const=unit_const, theta_offset=theta_offset
+        )
+        if verbose:
+            print("Current theta_offset:", theta_offset, sector_counts)
+        if len(set(sector_counts.values())) == 1:
+            return sector_paths, order_map, sector_counts, theta_offset
+        spread = max(sector_counts.values()) - min(sector_counts.values())
+        if spread < best[0]:
+            best = (spread, theta_offset)
+        theta_offset += step
+    # 回転だけでは一致しなかった: 境界の点を割り当て直す
+    theta_offset = best[1]
+    sector_of, max_deviation = reassign_sectors(polar_points, sectors, theta_offset)
+    sector_paths, order_map, sector_counts = continuous_sector_path(
+        polar_points, center=(0, 0), sectors=sectors, unit_const=unit_const,
+        theta_offset=theta_offset, sector_of=sector_of
+    )
+    if verbose:
+        print(f"Reassigned boundary points at theta_offset {theta_offset}: "
+              f"max deviation {math.degrees(max_deviation):.2f} deg", sector_counts)
+    return sector_paths, order_map, sector_counts, theta_offset
+
+def symmetrize_sector_paths(sector_paths, order_map, sectors):
+    """
+    セクター0のチェーンを回転複製して全セクターを置き換えた sector_paths と order_map を返す。
+    回転対称なレイアウトにするとLUTを1セクター分だけ持てばよくなる。
+    """
+    sector_angle = 2 * math.pi / sectors
+    new_paths, new_order = {}, {}
+    for j in range(sectors):
+        new_paths[j] = []
+        for r, theta in sector_paths[0]:
+            pt = (r, (theta + j * sector_angle) % (2 * math.pi))
+            new_paths[j].append(pt)
+            new_order[pt] = order_map.get((r, theta))
+    return new_paths, new_order
+
+def path_stats(path):
+    # パスの総延長と最大の点間距離
+    hops = [euclidean_distance(a, b) for a, b in zip(path, path[1:])]
+    return sum(hops), max(hops, default=0.0)
+
+def optimize_band_edges(polar_points, sectors, theta_offset=0, max_width=7.6, max_hop=None, sector_of=None):
+    """
+    各扇形のユニット境界を動的計画法で決め、パスの総延長を最小にする。
+    半径順に並べた点列を連続区間（ユニット）に区切る方法のうち、
+    continuous_sector_path と同じ規則（ユニット内はθ順、向きは交互）で結んだときの
+    総延長が最小になるものを選ぶ。
+    max_width: 1ユニット内の半径の幅の上限[mm]
+    max_hop: 指定すると、これより長い点間距離を含む区切り方を除外する
+             （満たす区切り方が無い扇形は警告を表示して max_hop なしで求める）
+    sector_of: 扇形の割り当て（continuous_sector_path と同じ）
+    返り値: {扇形番号: [ユニット境界の半径, ...]}（continuous_sector_path の band_edges に渡す）
+    """
+    sectors_points = classify_sectors(polar_points, sectors, theta_offset, sector_of)
+    band_edges = {}
+    for s in range(sectors):
+        pts = sectors_points[s]
+        edges = _optimize_sector_bands(pts, max_width, max_hop)
+        if edges is None and max_hop is not None:
+            print(f"Warning: sector {s} has no band split with every hop <= {max_hop} mm; "
+                  f"falling back to the unconstrained split")
+            edges = _optimize_sector_bands(pts, max_width, None)
+        band_edges[s] = edges
+    return band_edges
+
+def _optimize_sector_bands(pts, max_width, max_hop):
+    n = len(pts)
+    if n == 0:
+        return []
+    rs = [p['r'] for p in pts]
+    xy = [polar_to_cartesian(p['point']) for p in pts]
+    limit = math.inf if max_hop is None else max_hop
+
+    def dist(a, b):
+        return math.hypot(xy[a][0] - xy[b][0], xy[a][1] - xy[b][1])
+
+    # 区間[i, j) をユニットにしたときのθ順の並び（昇順）と内部の長さ
+    bands = {}
+    for i in range(n):
+        j = i + 1
+        while j <= n and rs[j - 1] - rs[i] <= max_width:
+            order = sorted(range(i, j), key=lambda k: pts[k]['adjusted_theta'])
+            hops = [dist(a, b) for a, b in zip(order, order[1:])]
+            if max(hops, default=0.0) <= limit:
+                bands[(i, j)] = (order, sum(hops))
+            j += 1
+
+    # best[(i, j, d)]: 区間[i, j) を向き d（0: 昇順, 1: 降順）で結んで終わる最小の総延長
+    best = {}
+    back = {}
+    ends = {}  # 終端 -> その位置で終わる状態のリスト
+    for (i, j), (order, internal) in sorted(bands.items()):
+        if i == 0:
+            # 最も内側のユニット：rの先頭と末尾を比較して順序を決める（continuous_sector_path と同じ）
+            d = 1 if rs[order[0]] > rs[order[-1]] else 0
+            best[(i, j, d)] = internal
+            back[(i, j, d)] = None
+            ends.setdefault(j, []).append((i, j, d))
+            continue
+        for d in (0, 1):
+            first = order[0] if d == 0 else order[-1]
+            candidate = None
+            for prev in ends.get(i, []):
+                if prev[2] == d:
+                    continue
+                prev_order = bands[(prev[0], prev[1])][0]
+                last = prev_order[-1] if prev[2] == 0 else prev_order[0]
+                hop = dist(last, first)
+                if hop > limit:
+                    continue
+                cost = best[prev] + hop + internal
+                if candidate is None or cost < candidate[0]:
+                    candidate = (cost, prev)
+            if candidate is not None:
+                best[(i, j, d)] = candidate[0]
+                back[(i, j, d)] = candidate[1]
+                ends.setdefault(j, []).append((i, j, d))
+
+    finals = ends.get(n, [])
+    if not finals:
+        return None
+    state = min(finals, key=lambda st: best[st])
+    # 区切り位置を辿り、隣り合う点の半径の中点を境界とする
+    edges = []
+    while back[state] is not None:
+        i = state[0]
+        edges.append((rs[i - 1] + rs[i]) / 2)
+        state = back[state]
+    return sorted(edges)
+
+# 例:
+# polar_points = フィロタキシスなどで生成した極座標点群（[(r, theta), ...] のリスト）
+# path = continuous_sector_path(polar_points, center=(0,0), sectors=6)
+
+def main():
+    """
+    回転だけでは点数がそろわない N（セクター数で割り切れない）や theta_offset で
+    reassign_sectors による割り当て直しを確認する。点数がそろうことに加えて、
+    0/2π の境界を越えて移された点でチェーンが扇形を横切っていないことを、
+    角度だけで分けた場合（点数はそろわない）の最大の点間距離と比べて確かめる。
+    """
+    import time
+    from .layout import generate_polar_points, COMP_PHY, ALPHA, SECTORS, UNIT_CONST
+
+    for n, theta_offset in ((1201, None), (1201, 0.5), (1000, None)):
+        polar_points = generate_polar_points(n, COMP_PHY/2, ALPHA)
+        start = time.perf_counter()
+        if theta_offset is None:
+            sector_paths, _, sector_counts, theta_offset = balanced_sector_path(
+                polar_points, sectors=SECTORS, unit_const=UNIT_CONST)
+        else:
+            sector_of, _ = reassign_sectors(polar_points, SECTORS, theta_offset)
+            sector_paths, _, sector_counts = continuous_sector_path(
+                polar_points, sectors=SECTORS, unit_const=UNIT_CONST, theta_offset=theta_offset, sector_of=sector_of)
+        elapsed = time.perf_counter() - start
+        _, max_deviation = reassign_sectors(polar_points, SECTORS, theta_offset)
+        max_hop = max(path_stats(path)[1] for path in sector_paths.values())
+        angular_paths, _, _ = continuous_sector_path(
+            polar_points, sectors=SECTORS, unit_const=UNIT_CONST, theta_offset=theta_offset)
+        angular_hop = max(path_stats(path)[1] for path in angular_paths.values())
+        print(f"N={n}: sector counts {sector_counts} at theta_offset {theta_offset:.2f} in {elapsed:.2f} s, "
+              f"max deviation {math.degrees(max_deviation):.2f} deg, "
+              f"max hop {max_hop:.2f} mm (angular split {angular_hop:.2f} mm)")
+
+        # 全点がちょうど1回ずつ使われ、点数の差は1以内（割り切れない分は先頭の扇形から多い）
+        used = [pt for path in sector_paths.values() for pt in path]
+        assert sorted(used) == sorted(polar_points), "points lost or duplicated"
+        expected = {k: n // SECTORS + (1 if k < n % SECTORS else 0) for k in range(SECTORS)}
+        assert sector_counts == expected, f"sector counts {sector_counts} != {expected}"
+        # 境界の点を移しても、点間距離は隣のユニットへの1ステップ分までしか伸びない
+        assert max_hop <= angular_hop + UNIT_CONST, f"max hop {max_hop:.2f} mm: chain crosses the sector"
+
+if __name__ == '__main__':
+    main()
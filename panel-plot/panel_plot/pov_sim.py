@@ -0,0 +1,188 @@
+import math
+import time
+import numpy as np
+
+from .layout import SLOTS
+
+
+def slot_on_fraction(rpm, slots, on_time=None, on_fraction=1.0):
+    """
+    1スロット中にLEDが点灯している割合を返す。
+    on_time[s] を指定した場合はRPMとスロット数から求めたスロット時間で割る。
+    """
+    if on_time is None:
+        return float(np.clip(on_fraction, 0.0, 1.0))
+    slot_time = 60.0 / (rpm * slots)
+    return float(np.clip(on_time / slot_time, 0.0, 1.0))
+
+
+def sample_image_frames(image, r, theta, slots, extent, direction=1):
+    """
+    静止画像 image (H, W) または (H, W, C) を回転パネル用のフレーム列に変換する。
+    各スロットで各LEDが通過する位置の画素（最近傍）をそのLEDの色とする。
+    extent: 画像が表す正方形領域の半幅[mm]（中心が原点）
+    返り値: (slots, N) または (slots, N, C)
+    """
+    image = np.asarray(image)
+    h, w = image.shape[:2]
+    r = np.asarray(r, dtype=np.float64)
+    theta = np.asarray(theta, dtype=np.float64)
+    # スロット中央でのロータ角度
+    phi = direction * (np.arange(slots) + 0.5) * (2 * np.pi / slots)
+    angle = theta[None, :] + phi[:, None]
+    x = r[None, :] * np.cos(angle)
+    y = r[None, :] * np.sin(angle)
+    col = np.clip(((x + extent) / (2 * extent) * w).astype(np.int64), 0, w - 1)
+    # 画像の行は上から下なのでYを反転
+    row = np.clip(((extent - y) / (2 * extent) * h).astype(np.int64), 0, h - 1)
+    return image[row, col]
+
+
+def simulate_pov(r, theta, frames, rpm=600, slots=SLOTS, on_time=None, on_fraction=1.0,
+                 resolution=256, extent=None, direction=1, oversample=2.0):
+    """
+    回転パネルの残像（POV）表示をラスタ画像として再現する。
+    r, theta: 各LEDの極座標（generate_polar_points の結果）
+    frames: スロットごとの各LEDの明るさ (slots, N) または色 (slots, N, C)、値は0～1
+            (N,) / (N, C) を渡すと全スロット同じ値とみなす
+    rpm, slots: 回転数と1回転あたりの角度スロット数
+    on_time / on_fraction: 1スロット中の点灯時間[s] または点灯割合
+    resolution: 出力画像の一辺の画素数、extent: 画像の半幅[mm]（省略時は最大半径）
+    oversample: 1画素あたりの円弧サンプル数
+
+    各LEDが各スロットの点灯時間中に描く円弧をサンプリングし、
+    その露光時間を画素に積算する。1回転あたりの時間で正規化するので、
+    image はその画素に見える平均の明るさ、coverage は点灯LEDが通過している時間の割合となる。
+    返り値: {'image', 'coverage', 'uniformity', 'extent', 'on_fraction'}
+    """
+    r = np.asarray(r, dtype=np.float64)
+    theta = np.asarray(theta, dtype=np.float64)
+    n = r.shape[0]
+    frames = np.asarray(frames, dtype=np.float64)
+    if frames.ndim == 1 or (frames.ndim == 2 and frames.shape[0] == n and frames.shape[0] != slots):
+        frames = np.broadcast_to(frames, (slots,) + frames.shape)
+    if frames.ndim == 2:
+        frames = frames[:, :, None]
+    channels = frames.shape[2]
+    if extent is None:
+        extent = float(r.max()) * 1.02
+
+    fraction = slot_on_fraction(rpm, slots, on_time, on_fraction)
+    slot_angle = 2 * np.pi / slots
+    pixel = 2 * extent / resolution
+    # 最外周の円弧長から1スロットあたりのサンプル数を決める
+    arc_px = r.max() * slot_angle * fraction / pixel
+    k = max(1, int(math.ceil(arc_px * oversample)))
+
+    # (slots, k) の回転角: 各スロットの点灯区間を k 等分した中点
+    sub = (np.arange(k) + 0.5) / k * fraction
+    phi = direction * (np.arange(slots)[:, None] + sub[None, :]) * slot_angle
+    # (slots, k, N) の画素座標
+    angle = theta[None, None, :] + phi[:, :, None]
+    x = r * np.cos(angle)
+    y = r * np.sin(angle)
+    col = ((x + extent) / pixel).astype(np.int64)
+    row = ((extent - y) / pixel).astype(np.int64)
+    inside = (col >= 0) & (col < resolution) & (row >= 0) & (row < resolution)
+    flat = np.where(inside, row * resolution + col, resolution * resolution)
+
+    # 1サンプルの露光時間（1回転に対する割合）
+    weight = fraction / (slots * k)
+    size = resolution * resolution + 1
+    coverage = np.bincount(flat.ravel(), minlength=size)[:-1] * weight
+    image = np.empty((resolution * resolution, channels))
+    for c in range(channels):
+        # フレームの値は同じスロット内のサブサンプルで共通
+        values = np.broadcast_to(frames[:, None, :, c], flat.shape)
+        image[:, c] = np.bincount(flat.ravel(), weights=values.ravel(), minlength=size)[:-1] * weight
+
+    coverage = coverage.reshape(resolution, resolution)
+    image = image.reshape(resolution, resolution, channels)
+    if channels == 1:
+        image = image[:, :, 0]
+    return {
+        'image': image,
+        'coverage': coverage,
+        'uniformity': uniformity_map(coverage, r.max(), extent),
+        'extent': extent,
+        'on_fraction': fraction,
+    }
+
+
+def uniformity_map(coverage, radius, extent, blur=3):
+    """
+    被覆率を局所平均（blur×blur 画素の箱フィルタ）し、円内の平均値で割った比を返す。
+    1.0 が平均的な明るさ、円の外側は NaN。
+    """
+    res = coverage.shape[0]
+    pad = blur // 2
+    padded = np.pad(coverage, pad, mode='constant')
+    # 積分画像による箱フィルタ
+    integral = padded.cumsum(0).cumsum(1)
+    integral = np.pad(integral, ((1, 0), (1, 0)))
+    local = (integral[blur:, blur:] - integral[:-blur, blur:]
+             - integral[blur:, :-blur] + integral[:-blur, :-blur]) / (blur * blur)
+    centers = (np.arange(res) + 0.5) * (2 * extent / res) - extent
+    xx, yy = np.meshgrid(centers, -centers)
+    mask = np.hypot(xx, yy) <= radius
+    mean = local[mask].mean()
+    result = np.full(coverage.shape, np.nan)
+    result[mask] = local[mask] / mean
+    return result
+
+
+def uniformity_stats(uniformity):
+    # 均一性マップの要約（変動係数と最小/最大比）
+    values = uniformity[~np.isnan(uniformity)]
+    return {
+        'cv': float(values.std() / values.mean()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+
+
+def main(show=True):
+    from .layout import build_layout
+
+    slots = SLOTS
+    rpm = 600
+    layout = build_layout()
+    N, comp_phy, polar_points = layout['n'], layout['comp_phy'], layout['polar_points']
+    r = np.array([p[0] for p in polar_points])
+    theta = np.array([p[1] for p in polar_points])
+
+    # テストパターン: 角度で色相が変わるカラーホイール
+    res = 256
+    extent = comp_phy / 2
+    centers = (np.arange(res) + 0.5) / res * 2 * extent - extent
+    xx, yy = np.meshgrid(centers, -centers)
+    hue = (np.arctan2(yy, xx) / (2 * np.pi)) % 1.0
+    pattern = np.stack([np.abs(hue * 6 - 3) - 1, 2 - np.abs(hue * 6 - 2), 2 - np.abs(hue * 6 - 4)], axis=-1)
+    pattern = np.clip(pattern, 0, 1)
+    frames = sample_image_frames(pattern, r, theta, slots, extent)
+
+    start = time.perf_counter()
+    result = simulate_pov(r, theta, frames, rpm=rpm, slots=slots, on_fraction=0.5,
+                          resolution=res, extent=extent)
+    elapsed = time.perf_counter() - start
+    print(f"{N} LEDs x {slots} slots -> {res}x{res}: {elapsed*1000:.1f} ms")
+    print("Uniformity:", uniformity_stats(result['uniformity']))
+    if not show:
+        return result
+
+    import matplotlib.pyplot as plt
+
+    image = result['image']
+    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+    axes[0].imshow(np.clip(image / image.max(), 0, 1), extent=(-extent, extent, -extent, extent))
+    axes[0].set_title('Perceived image')
+    axes[1].imshow(result['coverage'], extent=(-extent, extent, -extent, extent), cmap='gray')
+    axes[1].set_title('Coverage')
+    im = axes[2].imshow(result['uniformity'], extent=(-extent, extent, -extent, extent), cmap='coolwarm')
+    axes[2].set_title('Uniformity')
+    fig.colorbar(im, ax=axes[2])
+    plt.show()
+    return result
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+
+# WS2812C-2020 の電流（1チャンネル最大輝度時と、消灯時の待機電流）[mA]
+CHANNEL_MA = 5.0
+IDLE_MA = 0.6
+
+
+def sector_bounds(sector_paths):
+    # ID順で各セクターのLEDが始まる位置（np.add.reduceat 用）
+    sizes = [len(path) for _, path in sorted(sector_paths.items())]
+    return np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+
+def frame_currents(frames, channel_ma=CHANNEL_MA, idle_ma=IDLE_MA):
+    """
+    フレーム (F, N, C) の uint8 値からLEDごとの電流[mA]を求める。
+    各チャンネルの電流は値/255 に比例するとみなす。
+    channel_ma はスカラーまたはチャンネルごとの配列。
+    返り値: (F, N) の float32
+    """
+    frames = np.asarray(frames)
+    scale = np.broadcast_to(np.asarray(channel_ma, dtype=np.float32), (frames.shape[-1],)) / 255.0
+    return frames.astype(np.float32) @ scale + np.float32(idle_ma)
+
+
+def analyze_power(frame_chunks, bounds, budget_ma, channel_ma=CHANNEL_MA, idle_ma=IDLE_MA):
+    """
+    フレーム列（(F, N, C) 配列のチャンクを順に返すイテラブル）の消費電流を集計する。
+    bounds: sector_bounds() の結果
+    budget_ma: 電源の許容電流。合計がこれを超えたフレームを記録する
+    返り値: {
+        'led_avg_ma', 'led_peak_ma': LEDごとの平均/最大電流 (N,)
+        'sector_ma': フレームごとのセクター電流 (F, sectors)
+        'total_ma': フレームごとの合計電流 (F,)
+        'over_budget': 合計が budget_ma を超えたフレーム番号
+    }
+    """
+    led_sum = None
+    led_peak = None
+    sector_ma = []
+    frames_seen = 0
+    for chunk in frame_chunks:
+        current = frame_currents(chunk, channel_ma, idle_ma)
+        if led_sum is None:
+            led_sum = np.zeros(current.shape[1], dtype=np.float64)
+            led_peak = np.zeros(current.shape[1], dtype=np.float32)
+        led_sum += current.sum(axis=0)
+        np.maximum(led_peak, current.max(axis=0), out=led_peak)
+        sector_ma.append(np.add.reduceat(current, bounds, axis=1))
+        frames_seen += current.shape[0]
+    sector_ma = np.concatenate(sector_ma)
+    total_ma = sector_ma.sum(axis=1)
+    return {
+        'led_avg_ma': led_sum / frames_seen,
+        'led_peak_ma': led_peak,
+        'sector_ma': sector_ma,
+        'total_ma': total_ma,
+        'over_budget': np.flatnonzero(total_ma > budget_ma),
+    }
+
+
+def limit_brightness(frame_chunks, bounds, budget_ma, sector_budget_ma=None,
+                     channel_ma=CHANNEL_MA, idle_ma=IDLE_MA):
+    """
+    合計電流が budget_ma（指定があればセクターごとに sector_budget_ma も）を
+    超えるフレームの明るさを一律に下げたフレーム列を返すジェネレータ。
+    待機電流は明るさで変わらないので、点灯分だけを縮める。
+    """
+    for chunk in frame_chunks:
+        chunk = np.asarray(chunk)
+        current = frame_currents(chunk, channel_ma, idle_ma)
+        sector_ma = np.add.reduceat(current, bounds, axis=1)
+        sector_idle = np.add.reduceat(np.full(current.shape[1], idle_ma, dtype=np.float32), bounds)
+        total_idle = sector_idle.sum()
+        active = sector_ma.sum(axis=1) - total_idle
+        scale = np.clip((budget_ma - total_idle) / np.maximum(active, 1e-6), 0.0, 1.0)
+        if sector_budget_ma is not None:
+            sector_active = sector_ma - sector_idle
+            sector_scale = np.clip((sector_budget_ma - sector_idle) / np.maximum(sector_active, 1e-6), 0.0, 1.0)
+            scale = np.minimum(scale, sector_scale.min(axis=1))
+        if np.all(scale >= 1.0):
+            yield chunk
+        else:
+            yield (chunk * scale[:, None, None]).astype(np.uint8)
+
+
+def iter_chunks(frames, chunk=1024):
+    # 大きなフレーム配列（メモリマップ可）をチャンクに分けて返す
+    for i in range(0, len(frames), chunk):
+        yield frames[i:i + chunk]
+
+
+def main():
+    from .layout import build_layout
+
+    budget_ma = 8000        # DCDC基板からPanelへ供給できる電流[mA]
+    fps = 60
+    seconds = 180
+
+    layout = build_layout()
+    N = layout['n']
+    bounds = sector_bounds(layout['sector_paths'])
+
+    # テスト用フレーム列（3分間、明るさがゆっくり変化するランダムな映像）
+    rng = np.random.default_rng(0)
+    level = (0.5 + 0.5 * np.sin(np.arange(fps * seconds) / fps))[:, None, None]
+    frames = (rng.integers(0, 256, size=(fps * seconds, N, 3)) * level).astype(np.uint8)
+
+    start = time.perf_counter()
+    result = analyze_power(iter_chunks(frames), bounds, budget_ma)
+    elapsed = time.perf_counter() - start
+    print(f"{len(frames)} frames analyzed in {elapsed:.2f} s")
+    print(f"Total current: avg {result['total_ma'].mean():.0f} mA, peak {result['total_ma'].max():.0f} mA")
+    print("Sector peak [mA]:", np.round(result['sector_ma'].max(axis=0)).astype(int).tolist())
+    print(f"Frames over budget ({budget_ma} mA): {len(result['over_budget'])}")
+
+    limited = analyze_power(limit_brightness(iter_chunks(frames), bounds, budget_ma), bounds, budget_ma)
+    print(f"After limiting: peak {limited['total_ma'].max():.0f} mA, over budget {len(limited['over_budget'])}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+import asyncio
+import struct
+import time
+import numpy as np
+
+from .stream import FRAME_HEADER, FRAME_MAGIC
+
+# リング上のメッセージの宛先（ノード番号）。FRAME_HEADER の前に付ける
+NODE_HEADER = struct.Struct('<H')
+
+
+def sector_segments(sector_paths, chunks=1):
+    """
+    ID順のフレームをセクター（sector_paths の各チェーン）ごとの区間に分ける。
+    chunks > 1 の場合は各セクターをさらにチェーン順に chunks 等分する。
+    返り値: [(セクター番号, 開始ID, 終了ID), ...]
+    """
+    segments = []
+    start = 0
+    for sector, path in sorted(sector_paths.items()):
+        bounds = np.linspace(0, len(path), chunks + 1).round().astype(int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if hi > lo:
+                segments.append((sector, start + lo, start + hi))
+        start += len(path)
+    return segments
+
+
+def assign_segments(segments, nodes):
+    """
+    区間をノードに割り当てる。LED数の多い区間から順に、
+    その時点で負荷（LED数）が最も小さいノードへ入れる（LPT法）。
+    返り値: ノードごとの区間リスト（ID順に並べ替え済み）
+    """
+    loads = [0] * nodes
+    assignment = [[] for _ in range(nodes)]
+    for seg in sorted(segments, key=lambda s: s[2] - s[1], reverse=True):
+        k = loads.index(min(loads))
+        assignment[k].append(seg)
+        loads[k] += seg[2] - seg[1]
+    for segs in assignment:
+        segs.sort(key=lambda s: s[1])
+    return assignment
+
+
+def node_payload(frame, segments):
+    # ノードが担当する区間のLEDデータを連結する
+    return np.concatenate([frame[lo:hi] for _, lo, hi in segments]) if segments else frame[:0]
+
+
+class RingEmulator:
+    """
+    複数ノードのエミュレータ。ノードごとにTCPサーバを立てて受信する（リンク速度は送信側で模擬する）。
+    全ノードの区間がそろった時点でフレームを復元し、reference(seq) を渡した場合は
+    元のフレームと比較して不一致を数える。
+    star: ホストが各ノードへ個別のリンクで送る（node_handler）
+    ring: ホストはノード0にだけ送り、各ノードは自分宛て以外のメッセージを次のノードへ
+          自分の送信リンクで転送する（ring_handler）。上流のリンクほど下流の全ノード分を運ぶ。
+    """
+
+    def __init__(self, assignment, n_leds, channels=3, reference=None):
+        self.assignment = assignment
+        self.n_leds = n_leds
+        self.channels = channels
+        self.pending = {}
+        self.reference = reference
+        self.completed = []
+        self.mismatched = 0
+        self.forwarded = [0] * len(assignment)  # ノードごとの転送バイト数
+        self.handlers = []                       # ring の各ノードの受信タスク（終了待ち用）
+
+    def node_handler(self, k):
+        async def handle(reader, writer):
+            try:
+                while True:
+                    header = await reader.readexactly(FRAME_HEADER.size)
+                    magic, seq, _, length = FRAME_HEADER.unpack(header)
+                    if magic != FRAME_MAGIC:
+                        break
+                    data = await reader.readexactly(length)
+                    self.receive(k, seq, data)
+            except (asyncio.IncompleteReadError, ConnectionResetError):
+                pass
+            finally:
+                writer.close()
+        return handle
+
+    def ring_handler(self, k, downstream, link_bps=None):
+        """
+        リング上のノード k の受信処理。自分宛てのメッセージは receive に渡し、
+        それ以外は downstream (host, port) へ転送する（蓄積転送、リンク速度は link_bps で模擬）。
+        """
+        async def handle(reader, writer):
+            self.handlers.append(asyncio.current_task())
+            forward = None
+            link_free = time.perf_counter()
+            try:
+                if downstream is not None:
+                    _, forward = await asyncio.open_connection(*downstream)
+                while True:
+                    node, = NODE_HEADER.unpack(await reader.readexactly(NODE_HEADER.size))
+                    magic, seq, sent_at, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                    if magic != FRAME_MAGIC:
+                        break
+                    data = await reader.readexactly(length)
+                    if node == k:
+                        self.receive(k, seq, data)
+                        continue
+                    if forward is None:
+                        break
+                    size = NODE_HEADER.size + FRAME_HEADER.size + length
+                    if link_bps:
+                        # 上流の送信時刻（= 受信し終えた時刻）より前からは送れない。
+                        # 送信時刻は予定時刻で積算するので、短い待ち時間の誤差がホップごとに溜まらない
+                        link_free = max(link_free, sent_at) + size * 8 / link_bps
+                        await asyncio.sleep(max(0.0, link_free - time.perf_counter()))
+                        sent_at = link_free
+                    else:
+                        sent_at = time.perf_counter()
+                    forward.write(NODE_HEADER.pack(node) + FRAME_HEADER.pack(magic, seq, sent_at, length))
+                    forward.write(data)
+                    await forward.drain()
+                    self.forwarded[k] += size
+            except (asyncio.IncompleteReadError, ConnectionResetError):
+                pass
+            finally:
+                if forward is not None:
+                    forward.close()
+                writer.close()
+        return handle
+
+    def receive(self, k, seq, data):
+        # ノード k の区間をフレームに書き戻し、全ノード分そろったら完了とする
+        frame, received = self.pending.get(seq, (None, 0))
+        if frame is None:
+            frame = np.zeros((self.n_leds, self.channels), dtype=np.uint8)
+        values = np.frombuffer(data, dtype=np.uint8).reshape(-1, self.channels)
+        offset = 0
+        for _, lo, hi in self.assignment[k]:
+            frame[lo:hi] = values[offset:offset + hi - lo]
+            offset += hi - lo
+        received += 1
+        if received == len(self.assignment):
+            self.pending.pop(seq, None)
+            self.completed.append(time.perf_counter())
+            if self.reference is not None and not np.array_equal(frame, self.reference(seq)):
+                self.mismatched += 1
+        else:
+            self.pending[seq] = (frame, received)
+
+    def report(self):
+        """全ノードから復元できたフレーム数とfps（ring では各ノードが転送した1フレームあたりのバイト数も）"""
+        if len(self.completed) < 2:
+            return {'frames': len(self.completed)}
+        t = np.array(self.completed)
+        report = {
+            'frames': len(t),
+            'fps': float((len(t) - 1) / (t[-1] - t[0])),
+            'incomplete': len(self.pending),
+            'mismatched': self.mismatched,
+        }
+        if any(self.forwarded):
+            report['forwarded_bytes_per_frame'] = [round(b / len(t)) for b in self.forwarded]
+        return report
+
+
+async def send_to_node(host, port, frames, segments, duration, link_bps=None):
+    """
+    1ノード分の送信。link_bps を指定するとリンク速度に合わせて送信間隔を空ける
+    （送信予定時刻を積算するので、短い待ち時間の誤差が溜まらない）。
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    start = time.perf_counter()
+    end_time = start + duration
+    link_free = start
+    sent = 0
+    try:
+        for seq, frame in enumerate(frames):
+            if time.perf_counter() >= end_time:
+                break
+            payload = node_payload(frame, segments).tobytes()
+            if link_bps:
+                link_free += (FRAME_HEADER.size + len(payload)) * 8 / link_bps
+                await asyncio.sleep(max(0.0, link_free - time.perf_counter()))
+            writer.write(FRAME_HEADER.pack(FRAME_MAGIC, seq, time.perf_counter(), len(payload)))
+            writer.write(payload)
+            await writer.drain()
+            sent += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return sent
+
+
+async def send_to_ring(host, port, frames, assignment, duration, link_bps=None):
+    """
+    リングの入口（ノード0）へ、1フレームごとに全ノード分の区間を宛先付きで送る。
+    ホストからノード0へのリンクはフレーム全体を運ぶ。
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    start = time.perf_counter()
+    end_time = start + duration
+    link_free = start
+    sent = 0
+    try:
+        for seq, frame in enumerate(frames):
+            if time.perf_counter() >= end_time:
+                break
+            # 遠いノード宛てから送る（ホップ数の多い区間を先に出して、フレームがそろうまでの遅れを縮める）
+            for k in reversed(range(len(assignment))):
+                payload = node_payload(frame, assignment[k]).tobytes()
+                if link_bps:
+                    link_free += (NODE_HEADER.size + FRAME_HEADER.size + len(payload)) * 8 / link_bps
+                    await asyncio.sleep(max(0.0, link_free - time.perf_counter()))
+                # 送信時刻は予定時刻（下流のノードはこの時刻から転送を始められる）
+                sent_at = link_free if link_bps else time.perf_counter()
+                writer.write(NODE_HEADER.pack(k) + FRAME_HEADER.pack(FRAME_MAGIC, seq, sent_at, len(payload)))
+                writer.write(payload)
+                await writer.drain()
+            sent += 1
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return sent
+
+
+async def run_ring_benchmark(frames, assignment, duration, link_bps, topology='ring', host='127.0.0.1'):
+    """
+    ノード数分のエミュレータを起動し、担当区間を送る。
+    frames は (フレーム数, N, channels) の配列で、繰り返し送る。
+    topology: 'ring'（ノード0から順に転送）/ 'star'（各ノードへ並行に送る）
+    """
+    n_frames, n_leds, channels = frames.shape
+    emulator = RingEmulator(assignment, n_leds, channels,
+                            reference=lambda seq: frames[seq % n_frames])
+
+    def frame_iter():
+        seq = 0
+        while True:
+            yield frames[seq % n_frames]
+            seq += 1
+
+    if topology == 'star':
+        servers = [await asyncio.start_server(emulator.node_handler(k), host, 0)
+                   for k in range(len(assignment))]
+        ports = [s.sockets[0].getsockname()[1] for s in servers]
+        await asyncio.gather(*[send_to_node(host, port, frame_iter(), segs, duration, link_bps)
+                               for port, segs in zip(ports, assignment)])
+    elif topology == 'ring':
+        # 下流のノードから起動し、各ノードに次のノードの宛先を渡す
+        servers = []
+        downstream = None
+        for k in reversed(range(len(assignment))):
+            server = await asyncio.start_server(emulator.ring_handler(k, downstream, link_bps), host, 0)
+            servers.append(server)
+            downstream = (host, server.sockets[0].getsockname()[1])
+        await send_to_ring(*downstream, frame_iter(), assignment, duration, link_bps)
+        # 入口が閉じると各ノードが転送を終えてから順に閉じるので、リングが空になるまで待つ
+        await asyncio.wait(emulator.handlers, timeout=duration)
+    else:
+        raise ValueError(f"unknown topology: {topology}")
+    await asyncio.sleep(0.1)
+    for s in servers:
+        s.close()
+        await s.wait_closed()
+    return emulator.report()
+
+
+def main():
+    from .layout import build_layout
+
+    link_bps = 2e6      # 1ノードあたりのリンク速度を模擬
+    duration = 2.0
+
+    layout = build_layout()
+    N = layout['n']
+    segments = sector_segments(layout['sector_paths'], chunks=2)
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(16, N, 3), dtype=np.uint8)
+
+    # star は各ノードが専用のリンクを持つ場合の上限、ring はホストからの入口のリンクを全データが通る実際の構成
+    for topology in ('star', 'ring'):
+        base_fps = None
+        for nodes in (1, 2, 3, 4, 6):
+            assignment = assign_segments(segments, nodes)
+            loads = [int(sum(hi - lo for _, lo, hi in segs)) for segs in assignment]
+            report = asyncio.run(run_ring_benchmark(frames, assignment, duration, link_bps, topology))
+            fps = report.get('fps', 0.0)
+            base_fps = base_fps or fps
+            print(f"{topology} {nodes} nodes: LEDs per node {loads}, {report}, scaling x{fps / base_fps:.2f}")
+
+if __name__ == '__main__':
+    main()
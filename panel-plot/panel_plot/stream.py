@@ -0,0 +1,209 @@
+import asyncio
+import struct
+import time
+import numpy as np
+
+# フレームメッセージ（ホスト -> ロータ）: magic, 連番, 送信時刻, ペイロード長
+FRAME_HEADER = struct.Struct('<4sIdI')
+FRAME_MAGIC = b'MDF3'
+# 回転同期メッセージ（ロータ -> ホスト）: magic, 回転数, 時刻
+TICK_HEADER = struct.Struct('<4sId')
+TICK_MAGIC = b'MDTK'
+
+
+def open_frame_file(path, n_leds, channels=3):
+    """
+    フレームファイル（uint8 の (フレーム数, n_leds, channels) を連結したもの）を
+    メモリマップして返す。フレームの読み出しはコピーなしのスライスになる。
+    """
+    frame_bytes = n_leds * channels
+    mm = np.memmap(path, dtype=np.uint8, mode='r')
+    return mm[:len(mm) // frame_bytes * frame_bytes].reshape(-1, n_leds, channels)
+
+
+def loop_frames(frames):
+    # フレーム配列を無限に繰り返すジェネレータ
+    while True:
+        for frame in frames:
+            yield frame
+
+
+class StreamStats:
+    # ホスト側の送信統計
+    def __init__(self):
+        self.produced = 0
+        self.sent = 0
+        self.dropped = 0
+        self.skipped_ticks = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+async def produce_frames(queue, frames, fps, stats):
+    """
+    フレームを fps の速さでキューへ入れる。
+    キューが一杯（送信が回転に追いついていない）の場合は最も古いフレームを捨てる。
+    """
+    period = 1.0 / fps
+    next_time = time.perf_counter()
+    for seq, frame in enumerate(frames):
+        if queue.full():
+            queue.get_nowait()
+            stats.dropped += 1
+        queue.put_nowait((seq, frame))
+        stats.produced += 1
+        next_time += period
+        await asyncio.sleep(max(0.0, next_time - time.perf_counter()))
+
+
+async def stream_frames(host, port, frames, fps, duration, queue_size=2):
+    """
+    ロータ（またはエミュレータ）に接続し、回転同期メッセージを受けるたびに
+    キューから最新のフレームを1枚送る。
+    前のフレームの送信（drain）が終わっていない回転ではフレームを送らない。
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    queue = asyncio.Queue(maxsize=queue_size)
+    stats = StreamStats()
+    producer = asyncio.create_task(produce_frames(queue, frames, fps, stats))
+    sending = None
+    end_time = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < end_time:
+            try:
+                data = await asyncio.wait_for(reader.readexactly(TICK_HEADER.size),
+                                              end_time - time.perf_counter())
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                break
+            magic, _, _ = TICK_HEADER.unpack(data)
+            if magic != TICK_MAGIC:
+                continue
+            if sending is not None and not sending.done():
+                # リンクが詰まっている: この回転は見送る
+                stats.skipped_ticks += 1
+                continue
+            if queue.empty():
+                continue
+            seq, frame = queue.get_nowait()
+            # キューに残っている古いフレームは表示する意味がないので捨てる
+            while not queue.empty():
+                seq, frame = queue.get_nowait()
+                stats.dropped += 1
+            payload = memoryview(np.ascontiguousarray(frame)).cast('B')
+            writer.write(FRAME_HEADER.pack(FRAME_MAGIC, seq, time.perf_counter(), len(payload)))
+            writer.write(payload)
+            stats.sent += 1
+            sending = asyncio.create_task(writer.drain())
+    finally:
+        producer.cancel()
+        writer.close()
+        await writer.wait_closed()
+    return stats
+
+
+class RotorEmulator:
+    """
+    ロータの代わりにフレームを受信するエミュレータ（TCPサーバ）。
+    rpm に合わせて回転同期メッセージを送り、受信したフレームから
+    達成fps、回転に対する遅れのジッタ、間引き率とリンクでの欠落率を集計する。
+    link_bps を指定すると受信側の転送速度を模擬する（TCPの背圧がかかる）。
+    """
+
+    def __init__(self, rpm, link_bps=None):
+        self.rpm = rpm
+        self.link_bps = link_bps
+        self.last_tick = None
+        self.arrivals = []
+        self.latencies = []
+        self.seqs = []
+
+    async def handle(self, reader, writer):
+        ticker = asyncio.create_task(self.send_ticks(writer))
+        try:
+            while True:
+                header = await reader.readexactly(FRAME_HEADER.size)
+                magic, seq, _, length = FRAME_HEADER.unpack(header)
+                if magic != FRAME_MAGIC:
+                    break
+                await reader.readexactly(length)
+                if self.link_bps:
+                    await asyncio.sleep(length * 8 / self.link_bps)
+                now = time.perf_counter()
+                self.arrivals.append(now)
+                self.seqs.append(seq)
+                # 直前の回転同期からの遅れ
+                if self.last_tick is not None:
+                    self.latencies.append(now - self.last_tick)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            ticker.cancel()
+            writer.close()
+
+    async def send_ticks(self, writer):
+        period = 60.0 / self.rpm
+        next_time = time.perf_counter()
+        rev = 0
+        while True:
+            now = time.perf_counter()
+            self.last_tick = now
+            writer.write(TICK_HEADER.pack(TICK_MAGIC, rev, now))
+            rev += 1
+            next_time += period
+            await asyncio.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def report(self, sent=None):
+        """
+        受信統計を返す（fps, ジッタ[ms], 間引き率, 欠落率）。
+        skip_rate: 連番の飛び（表示されなかったコンテンツのフレーム）の割合。
+                   コンテンツのfpsが回転数より高いとホストが意図的に間引くので、リンクが健全でも0にならない。
+        link_loss: ホストが送った sent 枚のうち受信できなかった割合（sent を渡した場合のみ）
+        """
+        if len(self.arrivals) < 2:
+            return {'frames': len(self.arrivals)}
+        arrivals = np.array(self.arrivals)
+        intervals = np.diff(arrivals)
+        seqs = np.array(self.seqs)
+        expected = seqs[-1] - seqs[0] + 1
+        report = {
+            'frames': len(arrivals),
+            'fps': float((len(arrivals) - 1) / (arrivals[-1] - arrivals[0])),
+            'interval_jitter_ms': float(intervals.std() * 1000),
+            'latency_jitter_ms': float(np.std(self.latencies) * 1000),
+            'skip_rate': float(1.0 - len(seqs) / expected),
+        }
+        if sent:
+            report['link_loss'] = float(1.0 - len(arrivals) / sent)
+        return report
+
+
+async def run_benchmark(frames, fps, rpm, duration, link_bps=None, host='127.0.0.1', port=0):
+    # エミュレータを起動してストリーミングし、双方の統計を返す
+    emulator = RotorEmulator(rpm, link_bps)
+    server = await asyncio.start_server(emulator.handle, host, port)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        stats = await stream_frames(host, port, frames, fps, duration)
+        await asyncio.sleep(0.1)
+    return stats.as_dict(), emulator.report(sent=stats.sent)
+
+
+def main():
+    # パラメータ設定
+    N = 1200
+    rpm = 1200          # ロータの回転数（1回転に1フレーム表示）
+    fps = 30            # コンテンツのフレームレート
+    duration = 5.0      # 計測時間[s]
+    link_bps = 12e6     # RS485 リンクの速度を模擬
+
+    # テスト用フレーム（明るさが変化するグラデーション）
+    frames = (np.arange(64)[:, None, None] * 4 + np.zeros((1, N, 3))).astype(np.uint8)
+    host_stats, rotor_stats = asyncio.run(
+        run_benchmark(loop_frames(frames), fps, rpm, duration, link_bps)
+    )
+    print("Host:", host_stats)
+    print("Rotor:", rotor_stats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+import math
+import time
+import numpy as np
+
+from .output import iter_units
+
+# 実装機の位置ずれの既定値: xy[mm]、rotation[度]
+#   分布は ('normal', σ) / ('uniform', 半幅) / None（ずれなし）
+TOLERANCE_DEFAULTS = {
+    "xy": ("normal", 0.05),
+    "rotation": ("normal", 1.0),
+}
+
+
+def placement_arrays(sector_paths, order_map, neo_pixel, mlcc):
+    """
+    export_units と同じ走査（iter_units）で全部品の配置を配列にまとめる。
+    返り値: {'x', 'y', 'rotation'[rad], 'half_w', 'half_h', 'unit', 'is_led'}
+    unit はユニット（NeoPixel と MLCC の組）の番号で、LED ID と同じ並び。
+    """
+    units = {"neopixel": neo_pixel, "mlcc": mlcc}
+    rows = []
+    unit = -1
+    for kind, _, x, y, rotation_degrees in iter_units(sector_paths, order_map, neo_pixel, mlcc):
+        if kind == "neopixel":
+            unit += 1
+        rows.append((x, y, math.radians(rotation_degrees),
+                     units[kind]["width"] / 2, units[kind]["height"] / 2, unit, kind == "neopixel"))
+    x, y, rotation, half_w, half_h, unit_index, is_led = zip(*rows)
+    return {
+        'x': np.array(x), 'y': np.array(y), 'rotation': np.array(rotation),
+        'half_w': np.array(half_w), 'half_h': np.array(half_h),
+        'unit': np.array(unit_index), 'is_led': np.array(is_led),
+    }
+
+
+def sample_error(rng, spec, size):
+    # 分布指定 spec に従う誤差を size の形で生成する
+    if spec is None:
+        return np.zeros(size)
+    kind, scale = spec
+    if kind == "normal":
+        return rng.normal(0.0, scale, size)
+    if kind == "uniform":
+        return rng.uniform(-scale, scale, size)
+    raise ValueError(f"unknown distribution: {kind}")
+
+
+def rect_separation(dx, dy, cos_a, sin_a, cos_b, sin_b, wa, ha, wb, hb):
+    """
+    回転した長方形の組（中心の差 dx, dy、回転角の cos/sin、半幅・半高さ）の分離距離を分離軸定理で求める。
+    負の値は重なりの深さ。角同士が最も近い場合は実際の距離より小さく出る（安全側の近似）。
+    すべて同じ形にブロードキャストできる配列を受け取る。
+    """
+    # 2つの長方形の相対角の |cos|, |sin|
+    c = np.abs(cos_a * cos_b + sin_a * sin_b)
+    s = np.abs(cos_a * sin_b - sin_a * cos_b)
+    # 4本の軸（各長方形の辺の向き）への中心差の射影と、投影半径の和との差
+    gap = np.abs(dx * cos_a + dy * sin_a) - (wa + wb * c + hb * s)
+    gap = np.maximum(gap, np.abs(-dx * sin_a + dy * cos_a) - (ha + wb * s + hb * c))
+    gap = np.maximum(gap, np.abs(dx * cos_b + dy * sin_b) - (wb + wa * c + ha * s))
+    gap = np.maximum(gap, np.abs(-dx * sin_b + dy * cos_b) - (hb + wa * s + ha * c))
+    return gap
+
+
+def candidate_pairs(parts, limit):
+    """
+    設計位置での分離距離が limit 未満の部品の組 (P, 2) と、その分離距離を返す。
+    同じユニットの NeoPixel と MLCC の間隔はユニット定義（offset）で決まるので対象外とする。
+    """
+    x, y = parts['x'], parts['y']
+    radius = np.hypot(parts['half_w'], parts['half_h'])
+    i, j = np.triu_indices(len(x), k=1)
+    near = np.hypot(x[j] - x[i], y[j] - y[i]) < radius[i] + radius[j] + limit
+    near &= parts['unit'][i] != parts['unit'][j]
+    i, j = i[near], j[near]
+    cos, sin = np.cos(parts['rotation']), np.sin(parts['rotation'])
+    separation = rect_separation(x[j] - x[i], y[j] - y[i], cos[i], sin[i], cos[j], sin[j],
+                                 parts['half_w'][i], parts['half_h'][i], parts['half_w'][j], parts['half_h'][j])
+    keep = separation < limit
+    return np.stack([i[keep], j[keep]], axis=1), separation[keep]
+
+
+def monte_carlo(parts, trials=10000, clearance=0.2, xy=TOLERANCE_DEFAULTS["xy"],
+                rotation=TOLERANCE_DEFAULTS["rotation"], search_margin=1.0, chunk=500, seed=0):
+    """
+    全部品の位置（x, y）と回転を独立にずらした試行を trials 回行い、クリアランス違反の確率と
+    LEDごとの半径方向・角度方向の誤差を集計する。試行は chunk 回分ずつまとめて配列で計算する。
+    clearance: 部品間の必要クリアランス[mm]
+    xy, rotation: 誤差の分布（TOLERANCE_DEFAULTS と同じ形式、rotation は度）
+    search_margin: 違反の判定対象とする組の設計クリアランスの上限（clearance に加算）[mm]
+    設計位置で既に clearance を満たさない組は位置ずれと関係なく毎回違反になるので、
+    nominal_violations に分けて返し、確率は残りの組だけで求める。
+    返り値: {'pairs', 'nominal_separation', 'pair_probability', 'unit_probability',
+             'board_probability', 'nominal_violations', 'nominal_violation_separation',
+             'radial_error', 'angular_error'}
+             radial_error[mm] / angular_error[度] は LED ID順の {'mean', 'std', 'max'}
+    """
+    rng = np.random.default_rng(seed)
+    pairs, nominal = candidate_pairs(parts, clearance + search_margin)
+    violating = nominal < clearance
+    nominal_violations, nominal_violation_separation = pairs[violating], nominal[violating]
+    pairs, nominal = pairs[~violating], nominal[~violating]
+    a, b = pairs[:, 0], pairs[:, 1]
+    n_parts = len(parts['x'])
+    n_units = int(parts['unit'].max()) + 1
+
+    # 組 -> ユニットの集計用: 組の両端のユニットについて、ユニット順に並べた組の先頭位置
+    pair_units = np.concatenate([parts['unit'][a], parts['unit'][b]])
+    pair_order = np.argsort(pair_units, kind='stable')
+    units_with_pairs, starts = np.unique(pair_units[pair_order], return_index=True)
+
+    led = np.flatnonzero(parts['is_led'])
+    led_x, led_y = parts['x'][led], parts['y'][led]
+    led_r, led_theta = np.hypot(led_x, led_y), np.arctan2(led_y, led_x)
+
+    pair_hits = np.zeros(len(pairs), dtype=np.int64)
+    unit_hits = np.zeros(n_units, dtype=np.int64)
+    board_hits = 0
+    sums = {k: np.zeros(len(led)) for k in ('radial', 'angular')}
+    squares = {k: np.zeros(len(led)) for k in ('radial', 'angular')}
+    peaks = {k: np.zeros(len(led)) for k in ('radial', 'angular')}
+
+    for done in range(0, trials, chunk):
+        t = min(chunk, trials - done)
+        dx = sample_error(rng, xy, (t, n_parts))
+        dy = sample_error(rng, xy, (t, n_parts))
+        rot = parts['rotation'] + np.radians(sample_error(rng, rotation, (t, n_parts)))
+
+        if len(pairs):
+            # cos/sin は部品ごとに1回だけ計算して組に配る
+            cos, sin = np.cos(rot), np.sin(rot)
+            separation = rect_separation(
+                parts['x'][b] - parts['x'][a] + dx[:, b] - dx[:, a],
+                parts['y'][b] - parts['y'][a] + dy[:, b] - dy[:, a],
+                cos[:, a], sin[:, a], cos[:, b], sin[:, b],
+                parts['half_w'][a], parts['half_h'][a], parts['half_w'][b], parts['half_h'][b])
+            violated = separation < clearance
+            pair_hits += violated.sum(axis=0)
+            board_hits += int(violated.any(axis=1).sum())
+            both = np.concatenate([violated, violated], axis=1)[:, pair_order]
+            unit_hits[units_with_pairs] += np.maximum.reduceat(both, starts, axis=1).sum(axis=0)
+
+        # LEDの発光中心のずれを半径方向と角度方向に分解
+        x = led_x + dx[:, led]
+        y = led_y + dy[:, led]
+        errors = {
+            'radial': np.hypot(x, y) - led_r,
+            'angular': np.degrees((np.arctan2(y, x) - led_theta + math.pi) % (2 * math.pi) - math.pi),
+        }
+        for k, e in errors.items():
+            sums[k] += e.sum(axis=0)
+            squares[k] += (e * e).sum(axis=0)
+            peaks[k] = np.maximum(peaks[k], np.abs(e).max(axis=0))
+
+    def summarize(k):
+        mean = sums[k] / trials
+        return {'mean': mean, 'std': np.sqrt(np.maximum(squares[k] / trials - mean * mean, 0.0)), 'max': peaks[k]}
+
+    return {
+        'pairs': pairs,
+        'nominal_separation': nominal,
+        'pair_probability': pair_hits / trials,
+        'unit_probability': unit_hits / trials,
+        'board_probability': board_hits / trials,
+        'nominal_violations': nominal_violations,
+        'nominal_violation_separation': nominal_violation_separation,
+        'radial_error': summarize('radial'),
+        'angular_error': summarize('angular'),
+    }
+
+
+def main():
+    from .layout import build_layout, NEO_PIXEL, MLCC
+
+    trials = 10000
+    clearance = 0.0     # 部品の外形同士が接触するかどうか（外形は plot.py の描画と同じ長方形）
+    layout = build_layout()
+    parts = placement_arrays(layout['sector_paths'], layout['order_map'], NEO_PIXEL, MLCC)
+
+    # 設計位置で既に違反している組（位置ずれの確率とは別に、配置を直す必要がある）
+    violations, depth = candidate_pairs(parts, clearance)
+    print(f"{len(violations)} pairs already below {clearance} mm as designed (excluded below):")
+    for (a, b), separation in zip(violations, depth):
+        print(f"  units {int(parts['unit'][a])} - {int(parts['unit'][b])}: {separation:.3f} mm")
+
+    for sigma in (0.05, 0.1, 0.2):
+        start = time.perf_counter()
+        result = monte_carlo(parts, trials=trials, clearance=clearance, xy=("normal", sigma))
+        elapsed = time.perf_counter() - start
+        worst = np.argsort(result['unit_probability'])[::-1][:3]
+        print(f"xy sigma {sigma} mm: {trials} trials x {len(parts['x'])} parts in {elapsed:.2f} s, "
+              f"{len(result['pairs'])} pairs checked (closest {result['nominal_separation'].min():.3f} mm as designed)")
+        print(f"  P(any clearance < {clearance} mm) = {result['board_probability']:.4f}, "
+              f"worst units {[(int(u), float(result['unit_probability'][u])) for u in worst]}")
+        print(f"  radial error std {result['radial_error']['std'].mean():.3f} mm, "
+              f"angular error std max {result['angular_error']['std'].max():.3f} deg "
+              f"(LED {int(result['angular_error']['std'].argmax())})")
+
+if __name__ == '__main__':
+    main()
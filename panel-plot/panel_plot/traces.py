@@ -0,0 +1,336 @@
+import re
+import time
+import uuid
+import numpy as np
+
+from .tolerance import placement_arrays
+
+# NeoPixel の DIN / DOUT パッド中心（部品座標系[mm]、x: 半径方向外向き、y: 円周方向）
+#   iter_units の回転では、チェーンの次のLEDは常に部品座標の -y 側にある
+#   フットプリント TomoshibiLibrary:NeoPixel_WS2812C-2020-V1 のパッド位置に合わせて調整する
+NEO_PIXEL_PINS = {"DIN": (0.0, 0.8), "DOUT": (0.0, -0.8)}
+# フットプリントのパッド番号（シンボル NeoPixel_WS2812C-2020-V1 のピン番号）
+PIN_NUMBERS = {"DOUT": "1", "DIN": "3"}
+
+# 配線の既定設定
+#   width: 配線幅[mm]、clearance: 部品外形との最小間隔[mm]
+#   detours: 迂回点の候補 (区間に沿った位置 0～1, 垂直方向の距離[mm])（距離 0 は直線）
+TRACE_SETTINGS = {
+    "width": 0.2,
+    "clearance": 0.2,
+    "detours": ((0.5, 0.0),) + tuple((a, d) for a in (0.5, 0.25, 0.75)
+                                     for d in (0.5, -0.5, 1.0, -1.0, 1.5, -1.5, 2.0, -2.0, 2.5, -2.5)),
+    "layer": "F.Cu",
+}
+
+# .kicad_pcb に書き込む配線の uuid の名前空間（同じ区間は再実行しても同じ uuid になる）
+TRACE_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'panel-plot/traces')
+
+
+def pin_positions(parts, pins=NEO_PIXEL_PINS):
+    # NeoPixel ごとの DIN / DOUT パッドの位置 {'DIN': (N, 2), 'DOUT': (N, 2)}（LED ID順）
+    led = np.flatnonzero(parts['is_led'])
+    cos, sin = np.cos(parts['rotation'][led]), np.sin(parts['rotation'][led])
+    positions = {}
+    for name, (px, py) in pins.items():
+        positions[name] = np.stack([parts['x'][led] + px * cos - py * sin,
+                                    parts['y'][led] + px * sin + py * cos], axis=1)
+    return positions
+
+
+def chain_hops(sector_paths):
+    """
+    各セクターのチェーンの区間（LED ID i の DOUT -> i + 1 の DIN）を返す。
+    セクターの境界は別チェーンなので区間にしない。返り値: (hops (H,) の開始LED ID, sector (H,))
+    """
+    starts, sectors = [], []
+    first = 0
+    for sector, path in sorted(sector_paths.items()):
+        starts.extend(range(first, first + len(path) - 1))
+        sectors.extend([sector] * (len(path) - 1))
+        first += len(path)
+    return np.array(starts), np.array(sectors)
+
+
+def segment_box_distance(p0, p1, half_w, half_h):
+    """
+    線分 p0 -> p1 と原点中心の軸平行な長方形（半幅 half_w、半高さ half_h）の距離。
+    交差していれば0。p0, p1 は (..., 2)、half_w / half_h はブロードキャストできる配列。
+    """
+    d = p1 - p0
+    half = np.stack(np.broadcast_arrays(half_w, half_h), axis=-1)
+    # 交差判定（スラブ法）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ta = (-half - p0) / d
+        tb = (half - p0) / d
+    parallel = d == 0
+    inside = np.abs(p0) <= half
+    t_min = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(ta, tb))
+    t_max = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(ta, tb))
+    enter = np.maximum(t_min.max(axis=-1), 0.0)
+    leave = np.minimum(t_max.min(axis=-1), 1.0)
+    crossing = enter <= leave
+
+    # 交差しない場合、最短距離は端点と長方形、または長方形の角と線分の間にある
+    def point_box(p):
+        return np.hypot(*np.moveaxis(np.maximum(np.abs(p) - half, 0.0), -1, 0))
+    dist = np.minimum(point_box(p0), point_box(p1))
+    length2 = np.maximum((d * d).sum(axis=-1), 1e-12)
+    for sx, sy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+        corner = half * np.array([sx, sy])
+        t = np.clip(((corner - p0) * d).sum(axis=-1) / length2, 0.0, 1.0)
+        dist = np.minimum(dist, np.hypot(*np.moveaxis(p0 + t[..., None] * d - corner, -1, 0)))
+    return np.where(crossing, 0.0, dist)
+
+
+def route_hops(starts, ends, obstacles, skip, width=TRACE_SETTINGS["width"],
+               clearance=TRACE_SETTINGS["clearance"], detours=TRACE_SETTINGS["detours"]):
+    """
+    区間ごとに始点 starts (H, 2) から終点 ends (H, 2) への配線を一括で求める。
+    候補は区間上の位置 along を垂直方向に offset[mm] ずらした点（detours の (along, offset)）を
+    経由する2本の線分（offset 0 は直線）で、障害物（obstacles: placement_arrays 形式の部品の長方形）から
+    clearance + width/2 以上離れた候補のうち最短のものを選ぶ。どの候補も足りない場合は最も離れた候補を選び、違反とする。
+    skip: (H, K) 区間ごとに障害物から除く部品番号（区間の両端のNeoPixel）
+    返り値: {'waypoints' (H, 2), 'straight' (H,) bool, 'length' (H,), 'clearance' (H,), 'violation' (H,) bool}
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    along, offset = np.asarray(detours, dtype=np.float64).T
+    vec = ends - starts
+    span = np.hypot(vec[:, 0], vec[:, 1])
+    normal = np.stack([-vec[:, 1], vec[:, 0]], axis=1) / np.maximum(span, 1e-12)[:, None]
+    waypoints = (starts[:, None, :] + along[None, :, None] * vec[:, None, :]
+                 + offset[None, :, None] * normal[:, None, :])   # (H, C, 2)
+    length = (np.hypot(*np.moveaxis(waypoints - starts[:, None], -1, 0))
+              + np.hypot(*np.moveaxis(ends[:, None] - waypoints, -1, 0)))
+
+    # 区間ごとに近くの障害物だけを組にする（候補の配線が届く範囲 + 部品の外接円）
+    ox, oy = obstacles['x'], obstacles['y']
+    o_radius = np.hypot(obstacles['half_w'], obstacles['half_h'])
+    mid = (starts + ends) / 2
+    reach = span / 2 + np.abs(offset).max() + clearance + width
+    near = np.hypot(ox[None, :] - mid[:, None, 0], oy[None, :] - mid[:, None, 1]) < reach[:, None] + o_radius[None, :]
+    near[np.arange(len(starts))[:, None], skip] = False
+    hop, obs = np.nonzero(near)
+
+    # 障害物の部品座標系で線分と長方形の距離を求める（組 x 候補 x 線分2本）
+    cos, sin = np.cos(obstacles['rotation'][obs]), np.sin(obstacles['rotation'][obs])
+    center = np.stack([ox[obs], oy[obs]], axis=1)
+
+    def to_local(p):
+        d = p - center[:, None, :]
+        return np.stack([d[..., 0] * cos[:, None] + d[..., 1] * sin[:, None],
+                         -d[..., 0] * sin[:, None] + d[..., 1] * cos[:, None]], axis=-1)
+    s_local = to_local(np.repeat(starts[hop][:, None, :], len(offset), axis=1))
+    w_local = to_local(waypoints[hop])
+    e_local = to_local(np.repeat(ends[hop][:, None, :], len(offset), axis=1))
+    hw, hh = obstacles['half_w'][obs][:, None], obstacles['half_h'][obs][:, None]
+    pair_dist = np.minimum(segment_box_distance(s_local, w_local, hw, hh),
+                           segment_box_distance(w_local, e_local, hw, hh))
+
+    # 区間ごとの最小距離（np.nonzero の結果は区間順に並んでいる）
+    min_dist = np.full((len(starts), len(offset)), np.inf)
+    if len(hop):
+        first = np.flatnonzero(np.r_[True, hop[1:] != hop[:-1]])
+        min_dist[hop[first]] = np.minimum.reduceat(pair_dist, first, axis=0)
+    ok = min_dist >= clearance + width / 2
+    best = np.where(ok.any(axis=1),
+                    np.argmin(np.where(ok, length, np.inf), axis=1),
+                    np.argmax(min_dist, axis=1))
+    rows = np.arange(len(starts))
+    return {
+        'waypoints': waypoints[rows, best],
+        'straight': offset[best] == 0,
+        'length': length[rows, best],
+        'clearance': min_dist[rows, best] - width / 2,
+        'violation': ~ok[rows, best],
+    }
+
+
+def route_chains(sector_paths, order_map, neo_pixel, mlcc, pins=NEO_PIXEL_PINS, **settings):
+    """
+    レイアウトの全チェーンの DOUT -> DIN 配線を求める。
+    障害物は全部品の外形（plot.py の描画と同じ長方形）で、区間の両端の NeoPixel は除く。
+    返り値: route_hops の結果に 'hops'（開始LED ID）、'sector'、'start'、'end' を加えた辞書
+    """
+    parts = placement_arrays(sector_paths, order_map, neo_pixel, mlcc)
+    positions = pin_positions(parts, pins)
+    hops, sectors = chain_hops(sector_paths)
+    led_part = np.flatnonzero(parts['is_led'])
+    skip = np.stack([led_part[hops], led_part[hops + 1]], axis=1)
+    starts, ends = positions["DOUT"][hops], positions["DIN"][hops + 1]
+    routes = route_hops(starts, ends, parts, skip, **settings)
+    routes.update({'hops': hops, 'sector': sectors, 'start': starts, 'end': ends})
+    return routes
+
+
+def violating_hops(routes):
+    # クリアランス違反の区間 [(開始LED ID, クリアランス[mm]), ...]
+    return [(int(hop), float(c)) for hop, c, v in zip(routes['hops'], routes['clearance'], routes['violation']) if v]
+
+
+def route_segments(routes, include_violations=False):
+    # 配線ごとの線分のリスト [(開始LED ID, [(x0, y0, x1, y1), ...]), ...]（直線は1本、迂回は2本）
+    # クリアランス違反の区間は include_violations=True のときだけ含める
+    result = []
+    for k, hop in enumerate(routes['hops']):
+        if routes['violation'][k] and not include_violations:
+            continue
+        s, w, e = routes['start'][k], routes['waypoints'][k], routes['end'][k]
+        if routes['straight'][k]:
+            result.append((int(hop), [(s[0], s[1], e[0], e[1])]))
+        else:
+            result.append((int(hop), [(s[0], s[1], w[0], w[1]), (w[0], w[1], e[0], e[1])]))
+    return result
+
+
+def chain_stats(routes):
+    # セクター（チェーン）ごとの配線の総延長、最長区間、迂回した区間数、クリアランス違反数
+    stats = {}
+    for sector in np.unique(routes['sector']):
+        m = routes['sector'] == sector
+        stats[int(sector)] = {
+            'hops': int(m.sum()),
+            'length': float(routes['length'][m].sum()),
+            'max_hop': float(routes['length'][m].max()),
+            'detoured': int((~routes['straight'][m]).sum()),
+            'violations': int(routes['violation'][m].sum()),
+            'min_clearance': float(routes['clearance'][m].min()),
+        }
+    return stats
+
+
+def trace_uuid(hop, index):
+    return str(uuid.uuid5(TRACE_NAMESPACE, f"D{hop + 1}/{index}"))
+
+
+_FOOTPRINT_START = re.compile(r'^  \(footprint ')
+_REFERENCE = re.compile(r'^    \((?:fp_text reference|property "Reference") "([^"]+)"')
+_PAD = re.compile(r'^    \(pad "([^"]*)"')
+_NET = re.compile(r'\(net (\d+) "((?:[^"\\]|\\.)*)"\)')
+_SEGMENT_UUID = re.compile(r'^  \(segment .*\((?:tstamp|uuid) "?([0-9a-f-]+)"?\)\)\s*$')
+
+
+def read_pad_nets(pcb_path):
+    """
+    .kicad_pcb から {(リファレンス, パッド番号): ネット番号} を読む。
+    bom.py の回路図パーサと同様に pcbnew が出力する固定のインデントを前提にした行単位の解析。
+    """
+    nets = {}
+    ref = pad = None
+    with open(pcb_path, encoding='utf-8') as f:
+        for line in f:
+            if _FOOTPRINT_START.match(line):
+                ref = pad = None
+                continue
+            m = _REFERENCE.match(line)
+            if m:
+                ref = m.group(1)
+                continue
+            m = _PAD.match(line)
+            if m:
+                pad = m.group(1)
+            if pad is not None and ref is not None:
+                m = _NET.search(line)
+                if m:
+                    nets[(ref, pad)] = int(m.group(1))
+                    pad = None
+    return nets
+
+
+def write_kicad_segments(pcb_path, routes, origin=(0.0, 0.0), width=TRACE_SETTINGS["width"],
+                         layer=TRACE_SETTINGS["layer"], out_path=None, include_violations=False):
+    """
+    配線を .kicad_pcb に (segment ...) として書き込む（KiCad 7 形式）。
+    origin: パネル中心の KiCad 座標[mm]。KiCad は Y 下向きなので Y を反転する。
+    各線分の uuid は区間から決まるので、再実行すると前回このツールが書いた配線を置き換える。
+    クリアランス違反の区間は include_violations=True でなければ書かない（前回書いた分も消える）。
+    ネットは DOUT パッドのネットを使う（見つからない場合は 0）。返り値: ネットが見つからなかった区間数
+    """
+    pad_nets = read_pad_nets(pcb_path)
+    segments = route_segments(routes, include_violations)
+    own = {trace_uuid(int(hop), i) for hop in routes['hops'] for i in range(2)}
+    with open(pcb_path, encoding='utf-8') as f:
+        lines = f.readlines()
+    # 前回の配線を除き、最後の閉じ括弧の前に追加する
+    kept = [line for line in lines if not ((m := _SEGMENT_UUID.match(line)) and m.group(1) in own)]
+    while kept and not kept[-1].strip():
+        kept.pop()
+    if not kept or kept[-1].strip() != ')':
+        raise ValueError(f"unexpected end of {pcb_path}")
+    ox, oy = origin
+    missing = 0
+    added = []
+    for hop, segs in segments:
+        net = pad_nets.get((f"D{hop + 1}", PIN_NUMBERS["DOUT"]))
+        if net is None:
+            missing += 1
+            net = 0
+        for i, (x0, y0, x1, y1) in enumerate(segs):
+            added.append(f'  (segment (start {ox + x0:.6f} {oy - y0:.6f}) (end {ox + x1:.6f} {oy - y1:.6f}) '
+                         f'(width {width}) (layer "{layer}") (net {net}) (tstamp {trace_uuid(hop, i)}))\n')
+    with open(out_path or pcb_path, 'w', encoding='utf-8') as f:
+        f.writelines(kept[:-1] + added + kept[-1:])
+    print(f"配線を {len(added)} 本書き込みました: {out_path or pcb_path}")
+    return missing
+
+
+def add_pcbnew_tracks(routes, board=None, origin=(0.0, 0.0), width=TRACE_SETTINGS["width"],
+                      include_violations=False):
+    """
+    pcbnew のスクリプトコンソールから配線を基板に追加する（kicad_tools_01.py と同じく GetBoard() を使う）。
+    ネットは DOUT パッドから取る。クリアランス違反の区間は include_violations=True でなければ追加しない。
+    pcbnew はこの関数の中でだけ読み込む。
+    """
+    import pcbnew
+    board = board or pcbnew.GetBoard()
+    ox, oy = origin
+
+    def point(x, y):
+        return pcbnew.VECTOR2I(pcbnew.FromMM(ox + x), pcbnew.FromMM(oy - y))
+    count = 0
+    for hop, segs in route_segments(routes, include_violations):
+        footprint = board.FindFootprintByReference(f"D{hop + 1}")
+        pad = footprint.FindPadByNumber(PIN_NUMBERS["DOUT"]) if footprint else None
+        for x0, y0, x1, y1 in segs:
+            track = pcbnew.PCB_TRACK(board)
+            track.SetStart(point(x0, y0))
+            track.SetEnd(point(x1, y1))
+            track.SetWidth(pcbnew.FromMM(width))
+            track.SetLayer(pcbnew.F_Cu)
+            if pad is not None:
+                track.SetNet(pad.GetNet())
+            board.Add(track)
+            count += 1
+    pcbnew.Refresh()
+    return count
+
+
+def main(pcb_path=None, origin=(0.0, 0.0), include_violations=False):
+    from .layout import build_layout, NEO_PIXEL, MLCC
+    from .polar_utils import path_stats
+
+    layout = build_layout()
+    start = time.perf_counter()
+    routes = route_chains(layout['sector_paths'], layout['order_map'], NEO_PIXEL, MLCC)
+    elapsed = time.perf_counter() - start
+    print(f"{len(routes['hops'])} hops routed in {elapsed * 1000:.1f} ms")
+    for sector, s in chain_stats(routes).items():
+        centers, _ = path_stats(layout['sector_paths'][sector])
+        print(f"Sector {sector}: {s['hops']} hops, length {s['length']:.1f} mm (centers {centers:.1f} mm), "
+              f"max hop {s['max_hop']:.2f} mm, detoured {s['detoured']}, violations {s['violations']}, "
+              f"min clearance {s['min_clearance']:.3f} mm")
+    violations = violating_hops(routes)
+    if violations:
+        action = "書き込みます" if include_violations else "書き込みません（--include-violations で含める）"
+        print(f"クリアランス違反の区間 {len(violations)} 本は{action}:")
+        for hop, clearance in violations:
+            print(f"  D{hop + 1} -> D{hop + 2}: clearance {clearance:.3f} mm")
+    if pcb_path:
+        missing = write_kicad_segments(pcb_path, routes, origin, include_violations=include_violations)
+        if missing:
+            print(f"DOUT のネットが見つからない区間: {missing}")
+    return routes
+
+if __name__ == '__main__':
+    main()